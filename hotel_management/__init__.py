@@ -0,0 +1,15 @@
+from .core import (GuestSearchIndex, HotelManagementSystem, IdAllocator, IncomeLedger, OccupancyCalendar,
+                   ReadWriteLock, ReservationAnalytics, normalize_search_text)
+from .messages import notify, set_message_handler
+from .models import (Guest, Reservation, ReservationArchive, Room, day_to_jalali, format_day, jalali_to_day,
+                     jalali_today, parse_day, today_day)
+from .storage import (ArchiveStore, BinaryStorage, ConcurrentUpdateError, JsonStorage, MemoryStorage, SQLiteStorage,
+                      StorageBackend)
+
+__all__ = [
+    "ArchiveStore", "BinaryStorage", "ConcurrentUpdateError", "Guest", "GuestSearchIndex", "HotelManagementSystem",
+    "IdAllocator", "IncomeLedger", "JsonStorage", "MemoryStorage", "OccupancyCalendar", "ReadWriteLock",
+    "Reservation", "ReservationAnalytics", "ReservationArchive", "Room", "SQLiteStorage", "StorageBackend",
+    "day_to_jalali", "format_day", "jalali_to_day", "jalali_today", "normalize_search_text", "notify",
+    "parse_day", "set_message_handler", "today_day",
+]
@@ -0,0 +1,298 @@
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .core import HotelManagementSystem
+from .messages import notify
+from .storage import ConcurrentUpdateError
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+_API_MAX_BODY = 1 << 20
+_API_MAX_FORECAST_DAYS = 730
+
+
+def _required(data: Dict, name: str):
+    value = data.get(name)
+    if value is None or value == "":
+        raise ApiError(400, f"فیلد {name} الزامی است!")
+    return value
+
+
+def _query_number(value: Optional[str], cast: Callable = float):
+    if value is None or value == "":
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"مقدار {value} عدد معتبر نیست!") from None
+
+
+class HotelApiServer:
+    def __init__(self, hotel: HotelManagementSystem, host: str = "127.0.0.1", port: int = 8080,
+                 workers: int = 32):
+        self.hotel = hotel
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hotel-api")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._routes: List[Tuple[str, re.Pattern, Callable]] = [
+            ("GET", re.compile(r"/rooms"), self._list_rooms),
+            ("POST", re.compile(r"/rooms"), self._add_room),
+            ("GET", re.compile(r"/rooms/available"), self._available_rooms),
+            ("GET", re.compile(r"/rooms/([^/]+)"), self._get_room),
+            ("GET", re.compile(r"/guests"), self._list_guests),
+            ("POST", re.compile(r"/guests"), self._add_guest),
+            ("GET", re.compile(r"/guests/([^/]+)"), self._get_guest),
+            ("GET", re.compile(r"/reservations"), self._list_reservations),
+            ("POST", re.compile(r"/reservations"), self._make_reservation),
+            ("GET", re.compile(r"/reservations/([^/]+)"), self._get_reservation),
+            ("POST", re.compile(r"/reservations/([^/]+)/(check-in|check-out|cancel)"), self._update_reservation),
+            ("GET", re.compile(r"/reports/room-status"), self._room_status_report),
+            ("GET", re.compile(r"/reports/occupancy"), self._occupancy_report),
+            ("GET", re.compile(r"/reports/income"), self._income_report),
+            ("GET", re.compile(r"/reports/reservations"), self._reservations_report),
+        ]
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+
+    async def _call(self, function: Callable, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(function, *args, **kwargs))
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except ApiError as e:
+                    self._write_response(writer, e.status, {"error": str(e)}, False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, keep_alive, body = request
+                status, payload = await self._dispatch(method, target, body)
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bool, bytes]]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise ApiError(431, "سرآیندهای درخواست بیش از حد بزرگ است!") from None
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise ApiError(400, "درخواست نامعتبر است!") from None
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if value:
+                headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise ApiError(400, "درخواست نامعتبر است!") from None
+        if length > _API_MAX_BODY:
+            raise ApiError(413, "حجم درخواست بیش از حد مجاز است!")
+        try:
+            body = await reader.readexactly(length) if length else b""
+        except asyncio.IncompleteReadError:
+            return None
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+        return method.upper(), target, keep_alive, body
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        reason = HTTPStatus(status).phrase
+        writer.write(f"HTTP/1.1 {status} {reason}\r\n"
+                     f"Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body)
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, object]:
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        allowed = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(path)
+            if match is None:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            try:
+                data = json.loads(body) if body else {}
+                if not isinstance(data, dict):
+                    raise ApiError(400, "بدنه درخواست باید یک شیء JSON باشد!")
+                return await handler(query, data, *match.groups())
+            except ApiError as e:
+                return e.status, {"error": str(e)}
+            except (ValueError, TypeError) as e:
+                return 400, {"error": str(e)}
+            except ConcurrentUpdateError as e:
+                return 409, {"error": str(e)}
+            except Exception as e:
+                return 500, {"error": f"خطای داخلی سرور: {e}"}
+        if allowed:
+            return 405, {"error": "این روش درخواست برای این مسیر مجاز نیست!"}
+        return 404, {"error": "مسیر یافت نشد!"}
+
+    async def _list_rooms(self, query: Dict, data: Dict) -> Tuple[int, object]:
+        if query.get("status") == "خالی":
+            rooms = await self._call(self.hotel.get_available_rooms)
+        else:
+            rooms = await self._call(self.hotel.get_all_rooms)
+        return 200, [room.to_dict() for room in rooms]
+
+    async def _add_room(self, query: Dict, data: Dict) -> Tuple[int, object]:
+        price = _query_number(data.get("price", 5000000))
+        if price <= 0:
+            raise ApiError(400, "قیمت باید بیشتر از صفر باشد!")
+        room = await self._call(self.hotel.add_room, str(_required(data, "room_type")), price)
+        return 201, room.to_dict()
+
+    async def _available_rooms(self, query: Dict, data: Dict) -> Tuple[int, object]:
+        rooms = await self._call(self.hotel.search_available_rooms, _required(query, "check_in"),
+                                 _required(query, "check_out"), query.get("room_type"),
+                                 _query_number(query.get("min_price")), _query_number(query.get("max_price")),
+                                 _query_number(query.get("limit"), int))
+        return 200, [room.to_dict() for room in rooms]
+
+    async def _get_room(self, query: Dict, data: Dict, room_id: str) -> Tuple[int, object]:
+        room = self.hotel.get_room(room_id)
+        if room is None:
+            raise ApiError(404, "اتاق یافت نشد!")
+        reservations = await self._call(self.hotel.get_room_active_reservations, room_id)
+        return 200, dict(room.to_dict(), active_reservations=[res.to_dict() for res in reservations])
+
+    async def _list_guests(self, query: Dict, data: Dict) -> Tuple[int, object]:
+        if query.get("q"):
+            guests = await self._call(self.hotel.search_guests, query["q"],
+                                      _query_number(query.get("limit"), int))
+        else:
+            guests = await self._call(self.hotel.get_all_guests)
+        return 200, [guest.to_dict() for guest in guests]
+
+    async def _add_guest(self, query: Dict, data: Dict) -> Tuple[int, object]:
+        guest = await self._call(self.hotel.add_guest, str(data.get("name", "")), str(data.get("family", "")),
+                                 str(data.get("national_id", "")), str(data.get("phone", "")),
+                                 str(data.get("address", "")))
+        return 201, guest.to_dict()
+
+    async def _get_guest(self, query: Dict, data: Dict, guest_id: str) -> Tuple[int, object]:
+        guest = self.hotel.get_guest(guest_id)
+        if guest is None:
+            raise ApiError(404, "مهمان یافت نشد!")
+        return 200, guest.to_dict()
+
+    async def _list_reservations(self, query: Dict, data: Dict) -> Tuple[int, object]:
+        if query.get("guest_id"):
+            reservations = await self._call(self.hotel.get_guest_reservations, query["guest_id"])
+        elif query.get("room_id"):
+            reservations = await self._call(self.hotel.get_room_reservations, query["room_id"])
+        else:
+            reservations = await self._call(self.hotel.get_active_reservations)
+        return 200, [reservation.to_dict() for reservation in reservations]
+
+    async def _make_reservation(self, query: Dict, data: Dict) -> Tuple[int, object]:
+        reservation = await self._call(self.hotel.make_reservation, str(_required(data, "guest_id")),
+                                       str(_required(data, "room_id")), str(_required(data, "check_in_date")),
+                                       str(_required(data, "check_out_date")))
+        if reservation is None:
+            raise ApiError(409, "رزرو امکان‌پذیر نیست! مهمان، اتاق یا بازه زمانی را بررسی کنید.")
+        return 201, reservation.to_dict()
+
+    async def _get_reservation(self, query: Dict, data: Dict, reservation_id: str) -> Tuple[int, object]:
+        reservation = await self._call(self.hotel.get_reservation, reservation_id)
+        if reservation is None:
+            raise ApiError(404, "رزرو یافت نشد!")
+        return 200, reservation.to_dict()
+
+    async def _update_reservation(self, query: Dict, data: Dict, reservation_id: str,
+                                  action: str) -> Tuple[int, object]:
+        if await self._call(self.hotel.get_reservation, reservation_id) is None:
+            raise ApiError(404, "رزرو یافت نشد!")
+        operation, error = {
+            "check-in": (self.hotel.check_in, "رزرو فعال نیست یا هنوز به تاریخ ورود نرسیده‌ایم!"),
+            "check-out": (self.hotel.check_out, "رزرو فعال نیست یا تاریخ نامعتبر است!"),
+            "cancel": (self.hotel.cancel_reservation, "رزرو فعال نیست!")
+        }[action]
+        result = await self._call(operation, reservation_id)
+        if result is False:
+            raise ApiError(409, error)
+        reservation = await self._call(self.hotel.get_reservation, reservation_id)
+        return 200, reservation.to_dict()
+
+    async def _room_status_report(self, query: Dict, data: Dict) -> Tuple[int, object]:
+        return 200, await self._call(self.hotel.report_room_status)
+
+    async def _occupancy_report(self, query: Dict, data: Dict) -> Tuple[int, object]:
+        days = _query_number(query.get("days"), int)
+        if days is None:
+            days = 90
+        elif not 1 <= days <= _API_MAX_FORECAST_DAYS:
+            raise ApiError(400, f"تعداد روزها باید بین ۱ و {_API_MAX_FORECAST_DAYS} باشد!")
+        return 200, await self._call(self.hotel.occupancy_forecast, query.get("start"), days, query.get("room_type"))
+
+    async def _income_report(self, query: Dict, data: Dict) -> Tuple[int, object]:
+        start, end = _required(query, "start"), _required(query, "end")
+        total = await self._call(self.hotel.report_income, start, end)
+        by_room_type = await self._call(self.hotel.report_income_by_room_type, start, end)
+        return 200, {"start": start, "end": end, "total": total, "by_room_type": by_room_type}
+
+    async def _reservations_report(self, query: Dict, data: Dict) -> Tuple[int, object]:
+        reservations = await self._call(self.hotel.report_reservations_by_date, _required(query, "date"))
+        return 200, [reservation.to_dict() for reservation in reservations]
+
+
+async def serve_api(hotel: Optional[HotelManagementSystem] = None, host: str = "127.0.0.1", port: int = 8080) -> None:
+    server = HotelApiServer(hotel or HotelManagementSystem(), host, port)
+    await server.start()
+    notify(f"سرویس API روی http://{server.host}:{server.port} در حال اجراست.", "success")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
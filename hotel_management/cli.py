@@ -0,0 +1,207 @@
+import json
+import sys
+from typing import List, Optional
+
+from .core import HotelManagementSystem
+from .messages import set_message_handler
+from .storage import BinaryStorage, ConcurrentUpdateError, SQLiteStorage
+
+
+_DEFAULT_DATA_FILES = {"snapshot": "hotel_data.json", "journal": "hotel_data.json", "sqlite": "hotel_data.db",
+                       "binary": "hotel_data.bin"}
+
+
+def _cli_parser():
+    import argparse
+    parser = argparse.ArgumentParser(prog="hotel", description="مدیریت هتل از خط فرمان با خروجی JSON")
+    parser.add_argument("--data", help="مسیر فایل داده‌ها (پیش‌فرض بر اساس نوع ذخیره‌سازی)")
+    parser.add_argument("--storage", choices=["snapshot", "journal", "sqlite", "binary"], default="snapshot",
+                        help="نوع ذخیره‌سازی")
+    parser.add_argument("--shared", action="store_true", help="اشتراک داده‌ها با پایانه‌های دیگر")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rooms = commands.add_parser("rooms", help="مدیریت اتاق‌ها").add_subparsers(dest="action", required=True)
+    command = rooms.add_parser("list")
+    command.add_argument("--available", action="store_true")
+    command = rooms.add_parser("add")
+    command.add_argument("room_type")
+    command.add_argument("price", type=float)
+    command = rooms.add_parser("edit")
+    command.add_argument("room_id")
+    command.add_argument("--type", dest="room_type")
+    command.add_argument("--price", type=float)
+    command.add_argument("--status")
+    rooms.add_parser("delete").add_argument("room_id")
+    command = rooms.add_parser("available")
+    command.add_argument("check_in")
+    command.add_argument("check_out")
+    command.add_argument("--type", dest="room_type")
+    command.add_argument("--min-price", type=float)
+    command.add_argument("--max-price", type=float)
+    command.add_argument("--limit", type=int)
+
+    guests = commands.add_parser("guests", help="مدیریت مهمان‌ها").add_subparsers(dest="action", required=True)
+    command = guests.add_parser("list")
+    command.add_argument("--search")
+    command.add_argument("--limit", type=int)
+    command = guests.add_parser("add")
+    for name in ("name", "family", "national_id", "phone"):
+        command.add_argument(name)
+    command.add_argument("--address", default="")
+    guests.add_parser("delete").add_argument("guest_id")
+
+    command = commands.add_parser("reservations", help="فهرست رزروها")
+    command.add_argument("--guest", dest="guest_id")
+    command.add_argument("--room", dest="room_id")
+    command.add_argument("--all", action="store_true")
+    command = commands.add_parser("reserve", help="رزرو اتاق")
+    for name in ("guest_id", "room_id", "check_in", "check_out"):
+        command.add_argument(name)
+    for name in ("checkin", "checkout", "cancel"):
+        commands.add_parser(name).add_argument("reservation_id")
+
+    reports = commands.add_parser("report", help="گزارش‌ها").add_subparsers(dest="action", required=True)
+    reports.add_parser("status")
+    command = reports.add_parser("income")
+    command.add_argument("--from", dest="start", required=True)
+    command.add_argument("--to", dest="end", required=True)
+    command = reports.add_parser("occupancy")
+    command.add_argument("--from", dest="start")
+    command.add_argument("--days", type=int, default=90)
+    command.add_argument("--type", dest="room_type")
+    reports.add_parser("date").add_argument("date")
+
+    for name in ("import", "export"):
+        command = commands.add_parser(name)
+        command.add_argument("table", choices=["rooms", "guests", "reservations"])
+        command.add_argument("path")
+        command.add_argument("--format", choices=["csv", "ndjson"])
+        if name == "import":
+            command.add_argument("--source", default="", help="نام سامانه مبدا برای تطبیق شناسه‌ها")
+
+    command = commands.add_parser("serve", help="اجرای سرویس HTTP")
+    command.add_argument("--host", default="127.0.0.1")
+    command.add_argument("--port", type=int, default=8080)
+    return parser
+
+
+def _run_cli_command(hotel: HotelManagementSystem, args) -> object:
+    command, action = args.command, getattr(args, "action", None)
+    if command == "rooms":
+        if action == "list":
+            return [room.to_dict() for room in (hotel.get_available_rooms() if args.available
+                                                else hotel.get_all_rooms())]
+        if action == "add":
+            if args.price <= 0:
+                raise ValueError("قیمت باید بیشتر از صفر باشد!")
+            return hotel.add_room(args.room_type, args.price).to_dict()
+        if action == "edit":
+            if args.price is not None and args.price <= 0:
+                raise ValueError("قیمت باید بیشتر از صفر باشد!")
+            if not hotel.edit_room(args.room_id, args.room_type, args.price, args.status):
+                raise ValueError("اتاق یافت نشد!")
+            return hotel.get_room(args.room_id).to_dict()
+        if action == "delete":
+            if not hotel.delete_room(args.room_id):
+                raise ValueError("اتاق یافت نشد یا دارای رزرو فعال است!")
+            return {"deleted": args.room_id}
+        return [room.to_dict() for room in hotel.search_available_rooms(
+            args.check_in, args.check_out, args.room_type, args.min_price, args.max_price, args.limit)]
+    if command == "guests":
+        if action == "list":
+            guests = hotel.search_guests(args.search, args.limit) if args.search else hotel.get_all_guests()
+            return [guest.to_dict() for guest in guests]
+        if action == "add":
+            return hotel.add_guest(args.name, args.family, args.national_id, args.phone, args.address).to_dict()
+        if not hotel.delete_guest(args.guest_id):
+            raise ValueError("مهمان یافت نشد یا دارای رزرو فعال است!")
+        return {"deleted": args.guest_id}
+    if command == "reservations":
+        if args.guest_id:
+            reservations = hotel.get_guest_reservations(args.guest_id)
+        elif args.room_id:
+            reservations = hotel.get_room_reservations(args.room_id)
+        elif args.all:
+            reservations = hotel.get_all_reservations()
+        else:
+            reservations = hotel.get_active_reservations()
+        return [reservation.to_dict() for reservation in reservations]
+    if command == "reserve":
+        reservation = hotel.make_reservation(args.guest_id, args.room_id, args.check_in, args.check_out)
+        if reservation is None:
+            raise ValueError("رزرو امکان‌پذیر نیست! مهمان، اتاق یا بازه زمانی را بررسی کنید.")
+        return reservation.to_dict()
+    if command in ("checkin", "checkout", "cancel"):
+        if hotel.get_reservation(args.reservation_id) is None:
+            raise ValueError("رزرو یافت نشد!")
+        if command == "checkin" and not hotel.check_in(args.reservation_id):
+            raise ValueError("رزرو فعال نیست یا هنوز به تاریخ ورود نرسیده‌ایم!")
+        if command == "checkout" and hotel.check_out(args.reservation_id) is False:
+            raise ValueError("رزرو فعال نیست یا تاریخ نامعتبر است!")
+        if command == "cancel" and not hotel.cancel_reservation(args.reservation_id):
+            raise ValueError("رزرو فعال نیست!")
+        return hotel.get_reservation(args.reservation_id).to_dict()
+    if command == "report":
+        if action == "status":
+            return hotel.report_room_status()
+        if action == "income":
+            return {"start": args.start, "end": args.end, "total": hotel.report_income(args.start, args.end),
+                    "by_room_type": hotel.report_income_by_room_type(args.start, args.end)}
+        if action == "occupancy":
+            return hotel.occupancy_forecast(args.start, args.days, args.room_type)
+        return [reservation.to_dict() for reservation in hotel.report_reservations_by_date(args.date)]
+    if command == "import":
+        imported, errors = hotel.import_records(args.table, args.path, args.format, source=args.source)
+        return {"imported": imported, "errors": [{"row": row, "error": error} for row, error in errors]}
+    if command == "export":
+        return {"exported": hotel.export_records(args.table, args.path, args.format), "path": args.path}
+    import asyncio
+    from .api import serve_api
+    try:
+        asyncio.run(serve_api(hotel, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return {"stopped": True}
+
+
+def _print_to_stderr(message: str, message_type: str = "info") -> None:
+    print(message, file=sys.stderr)
+
+
+def cli(argv: Optional[List[str]] = None) -> int:
+    args = _cli_parser().parse_args(argv)
+    set_message_handler(_print_to_stderr)
+    data_file = args.data or _DEFAULT_DATA_FILES[args.storage]
+    try:
+        if args.shared and args.storage in ["sqlite", "binary"]:
+            raise ValueError("دسترسی همزمان فقط با ذخیره‌سازی JSON امکان‌پذیر است!")
+        if args.storage == "sqlite":
+            storage = SQLiteStorage(data_file)
+        elif args.storage == "binary":
+            storage = BinaryStorage(data_file)
+        else:
+            storage = None
+        hotel = HotelManagementSystem(data_file, args.storage if storage is None else "snapshot",
+                                      storage=storage, shared=args.shared)
+        try:
+            if hotel.load_error is not None:
+                raise ValueError(hotel.load_error)
+            result = _run_cli_command(hotel, args)
+        finally:
+            hotel.close()
+    except (ValueError, ConcurrentUpdateError, OSError) as e:
+        json.dump({"error": str(e)}, sys.stdout, ensure_ascii=False)
+        sys.stdout.write("\n")
+        return 1
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv in ([], ["--shared"]):
+        from .ui import main_menu
+        main_menu(shared="--shared" in argv)
+        return 0
+    return cli(argv)
@@ -0,0 +1,1766 @@
+import bisect
+import copy
+import heapq
+import inspect
+import itertools
+import json
+import sys
+import threading
+from array import array
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .messages import notify
+from .models import (Guest, Reservation, Room, _NATIONAL_ID_PATTERN, _PHONE_PATTERN, _RESERVATION_STATUSES,
+                     _STATUS_CODES, _date_ordinal, _history_columns, _id_code, day_to_jalali, format_day,
+                     jalali_to_day, jalali_today, parse_day, today_day)
+from .storage import (ArchiveStore, ConcurrentUpdateError, JsonStorage, StorageBackend, _TABLE_KEYS, _iter_records,
+                      _merge_imported_ids)
+
+
+class IncomeLedger:
+    __slots__ = ("days", "totals", "_prefix", "_valid", "_lock")
+
+    def __init__(self):
+        self.days = array("i")
+        self.totals = array("d")
+        self._prefix = array("d", [0.0])
+        self._valid = 1
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def add(self, day: int, amount: float) -> None:
+        index = bisect.bisect_left(self.days, day)
+        if index < len(self.days) and self.days[index] == day:
+            self.totals[index] += amount
+        else:
+            self.days.insert(index, day)
+            self.totals.insert(index, amount)
+        self._valid = min(self._valid, index + 1)
+
+    def _refresh(self) -> None:
+        if self._valid > len(self.days):
+            return
+        with self._lock:
+            if self._valid > len(self.days):
+                return
+            del self._prefix[self._valid:]
+            running = self._prefix[-1]
+            for amount in self.totals[self._valid - 1:]:
+                running += amount
+                self._prefix.append(running)
+            self._valid = len(self.days) + 1
+
+    def total(self, start_day: int, end_day: int) -> float:
+        if end_day < start_day:
+            return 0.0
+        self._refresh()
+        low = bisect.bisect_left(self.days, start_day)
+        high = bisect.bisect_right(self.days, end_day)
+        return self._prefix[high] - self._prefix[low]
+
+
+class OccupancyCalendar:
+    def __init__(self):
+        self.first_day = 0
+        self.counts = array("i")
+        self._counts_by_type: Dict[str, array] = {}
+        self._in_house: Dict[int, Dict[str, Reservation]] = {}
+
+    def _cover(self, start: int, end: int) -> None:
+        if not self.counts:
+            self.first_day = start
+        if start < self.first_day:
+            padding = array("i", [0]) * (self.first_day - start)
+            self.counts = padding + self.counts
+            for room_type, counts in self._counts_by_type.items():
+                self._counts_by_type[room_type] = padding + counts
+            self.first_day = start
+        missing = end - self.first_day - len(self.counts)
+        if missing > 0:
+            padding = array("i", [0]) * missing
+            self.counts.extend(padding)
+            for counts in self._counts_by_type.values():
+                counts.extend(padding)
+
+    def add(self, reservation: Reservation, room_type: str) -> None:
+        self._apply(reservation, room_type, 1)
+
+    def remove(self, reservation: Reservation, room_type: str) -> None:
+        self._apply(reservation, room_type, -1)
+
+    def _apply(self, reservation: Reservation, room_type: str, delta: int) -> None:
+        start = reservation.check_in_day
+        end = reservation.check_out_day
+        if start is None or end is None or end <= start:
+            return
+        self._cover(start, end)
+        type_counts = self._counts_by_type.get(room_type)
+        if type_counts is None:
+            type_counts = self._counts_by_type[room_type] = array("i", [0]) * len(self.counts)
+        for day in range(start, end):
+            index = day - self.first_day
+            self.counts[index] += delta
+            type_counts[index] += delta
+            if delta > 0:
+                self._in_house.setdefault(day, {})[reservation.reservation_id] = reservation
+            else:
+                guests = self._in_house.get(day, {})
+                guests.pop(reservation.reservation_id, None)
+                if not guests:
+                    self._in_house.pop(day, None)
+
+    def occupied(self, start_day: int, days: int = 1, room_type: Optional[str] = None) -> List[int]:
+        counts = self.counts if room_type is None else self._counts_by_type.get(room_type, array("i"))
+        offset = start_day - self.first_day
+        result = [0] * days
+        low = max(offset, 0)
+        high = min(offset + days, len(counts))
+        if low < high:
+            result[low - offset:high - offset] = counts[low:high]
+        return result
+
+    def room_types(self) -> List[str]:
+        return list(self._counts_by_type)
+
+    def reservations_on(self, day: int) -> List[Reservation]:
+        return list(self._in_house.get(day, {}).values())
+
+
+_SEARCH_TRANSLATION = str.maketrans({"ي": "ی", "ى": "ی", "ك": "ک", "\u200c": " ",
+                                     **{digit: str(value) for value, digit in enumerate("۰۱۲۳۴۵۶۷۸۹")},
+                                     **{digit: str(value) for value, digit in enumerate("٠١٢٣٤٥٦٧٨٩")}})
+
+
+def normalize_search_text(text: str) -> str:
+    return " ".join(text.translate(_SEARCH_TRANSLATION).lower().split())
+
+
+@lru_cache(maxsize=65536)
+def _text_grams(text: str) -> Tuple[str, ...]:
+    padded = f" {text} "
+    grams = {padded[index:index + 3] for index in range(len(padded) - 2)}
+    grams.update(" " + word[0] for word in text.split())
+    return tuple(grams)
+
+
+class GuestSearchIndex:
+    def __init__(self, guests: Iterable[Guest] = ()):
+        self._build(guests)
+
+    def _build(self, guests: Iterable[Guest]) -> None:
+        self._slots: Dict[str, int] = {}
+        self._guests: List[Optional[Guest]] = []
+        self._texts: List[Optional[str]] = []
+        self._contacts: List[Optional[Tuple[str, str]]] = []
+        self._grams: Dict[str, array] = {}
+        self._stale = 0
+        numbers = []
+        for guest in guests:
+            slot = self._add_text(guest)
+            numbers.append((guest.national_id, slot))
+            numbers.append((guest.phone, slot))
+        numbers.sort()
+        self._numbers = [number for number, _ in numbers]
+        self._number_slots = array("i", [slot for _, slot in numbers])
+
+    def _add_text(self, guest: Guest) -> int:
+        slot = len(self._guests)
+        text = normalize_search_text(f"{guest.name} {guest.family}")
+        self._slots[guest.guest_id] = slot
+        self._guests.append(guest)
+        self._texts.append(text)
+        self._contacts.append((guest.national_id, guest.phone))
+        grams = self._grams
+        for gram in _text_grams(text):
+            try:
+                grams[gram].append(slot)
+            except KeyError:
+                grams[gram] = array("i", [slot])
+        return slot
+
+    def add(self, guest: Guest) -> None:
+        slot = self._add_text(guest)
+        for number in (guest.national_id, guest.phone):
+            position = bisect.bisect_right(self._numbers, number)
+            self._numbers.insert(position, number)
+            self._number_slots.insert(position, slot)
+
+    def remove(self, guest_id: str) -> None:
+        slot = self._slots.pop(guest_id, None)
+        if slot is None:
+            return
+        self._guests[slot] = None
+        self._texts[slot] = None
+        self._contacts[slot] = None
+        self._stale += 1
+        if self._stale > 1000 and self._stale > len(self._slots):
+            self._build([guest for guest in self._guests if guest is not None])
+
+    def update(self, guest: Guest) -> None:
+        slot = self._slots.get(guest.guest_id)
+        if slot is not None and self._texts[slot] == normalize_search_text(f"{guest.name} {guest.family}") and \
+                self._contacts[slot] == (guest.national_id, guest.phone):
+            return
+        self.remove(guest.guest_id)
+        self.add(guest)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Guest]:
+        query = normalize_search_text(query)
+        if not query:
+            return []
+        slots = self._number_matches(query) if query.isdigit() else self._text_matches(query)
+        found: Dict[int, Guest] = {}
+        for slot in slots:
+            guest = self._guests[slot]
+            if guest is None or slot in found:
+                continue
+            found[slot] = guest
+            if limit is not None and len(found) >= limit:
+                break
+        return list(found.values())
+
+    def _number_matches(self, query: str) -> Iterable[int]:
+        position = bisect.bisect_left(self._numbers, query)
+        while position < len(self._numbers) and self._numbers[position].startswith(query):
+            yield self._number_slots[position]
+            position += 1
+
+    def _text_matches(self, query: str) -> Iterable[int]:
+        if len(query) >= 3:
+            grams = [query[index:index + 3] for index in range(len(query) - 2)]
+            needle = query
+        else:
+            grams = [" " + query]
+            needle = " " + query
+        postings = [self._grams.get(gram) for gram in grams]
+        if any(posting is None for posting in postings):
+            return
+        for slot in min(postings, key=len):
+            text = self._texts[slot]
+            if text is not None and needle in f" {text}":
+                yield slot
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("برای گزارش‌های تحلیلی کتابخانه numpy لازم است (pip install numpy).") from None
+    return numpy
+
+
+class ReservationAnalytics:
+    LEAD_TIME_EDGES = (0, 1, 8, 31, 91)
+    LEAD_TIME_LABELS = ("همان روز", "۱ تا ۷ روز", "۸ تا ۳۰ روز", "۳۱ تا ۹۰ روز", "بیش از ۹۰ روز")
+
+    def __init__(self, columns: Dict[str, array], room_types: Dict[str, str]):
+        np = _import_numpy()
+        self.room_types = sorted(set(room_types.values())) + ["نامشخص"]
+        unknown = len(self.room_types) - 1
+        type_of = {room_type: index for index, room_type in enumerate(self.room_types)}
+        self.inventory = np.bincount([type_of[room_type] for room_type in room_types.values()],
+                                     minlength=len(self.room_types))
+
+        codes = [(_id_code(room_id), type_of[room_type]) for room_id, room_type in room_types.items()]
+        codes = [(code, index) for code, index in codes if code >= 0]
+        lookup = np.full(max((code for code, _ in codes), default=0) + 2, unknown, dtype=np.int64)
+        for code, index in codes:
+            lookup[code] = index
+
+        room_codes = np.asarray(columns["room_ids"], dtype=np.int64)
+        check_in = np.asarray(columns["check_in_days"], dtype=np.int64)
+        check_out = np.asarray(columns["check_out_days"], dtype=np.int64)
+        booking = np.asarray(columns["booking_days"], dtype=np.int64)
+        status = np.asarray(columns["status_codes"], dtype=np.int64)
+        cost = np.asarray(columns["total_costs"], dtype=np.float64)
+
+        sold = (((status == _STATUS_CODES["فعال"]) | (status == _STATUS_CODES["تسویه شده"]))
+                & (check_in > 0) & (check_out >= check_in))
+        room_codes, check_in, check_out, booking, cost = (
+            column[sold] for column in (room_codes, check_in, check_out, booking, cost))
+        check_out = np.maximum(check_out, check_in + 1)
+        in_lookup = (room_codes >= 0) & (room_codes < len(lookup))
+        stay_type = np.where(in_lookup, lookup[np.where(in_lookup, room_codes, len(lookup) - 1)], unknown)
+
+        self.months: List[str] = []
+        if not len(check_in):
+            return
+        first_year = day_to_jalali(int(check_in.min()))[0]
+        last_year = day_to_jalali(int(check_out.max()))[0]
+        month_starts = [jalali_to_day(year, month, 1)
+                        for year in range(first_year, last_year + 1) for month in range(1, 13)]
+        month_starts.append(jalali_to_day(last_year + 1, 1, 1))
+        self.months = [f"{year:04d}-{month:02d}" for year in range(first_year, last_year + 1)
+                       for month in range(1, 13)]
+        month_starts = np.asarray(month_starts, dtype=np.int64)
+        month_count = len(self.months)
+        type_count = len(self.room_types)
+        cells = month_count * type_count
+
+        nights = check_out - check_in
+        stay_of_night = np.repeat(np.arange(len(nights)), nights)
+        first_night = np.repeat(np.cumsum(nights) - nights, nights)
+        night_days = check_in[stay_of_night] + (np.arange(len(stay_of_night)) - first_night)
+        night_month = np.searchsorted(month_starts, night_days, side="right") - 1
+        night_key = night_month * type_count + stay_type[stay_of_night]
+        self.nights_sold = np.bincount(night_key, minlength=cells).reshape(month_count, type_count)
+        self.revenue = np.bincount(night_key, weights=(cost / nights)[stay_of_night],
+                                   minlength=cells).reshape(month_count, type_count)
+        self.available = np.diff(month_starts)[:, None] * self.inventory[None, :]
+
+        stay_key = (np.searchsorted(month_starts, check_in, side="right") - 1) * type_count + stay_type
+        self.stays = np.bincount(stay_key, minlength=cells).reshape(month_count, type_count)
+        self.stay_nights = np.bincount(stay_key, weights=nights, minlength=cells).reshape(month_count, type_count)
+
+        lead = check_in - booking
+        booked = (booking > 0) & (lead >= 0)
+        bins = len(self.LEAD_TIME_EDGES)
+        lead_bin = np.searchsorted(np.asarray(self.LEAD_TIME_EDGES), lead[booked], side="right") - 1
+        self.lead_times = np.bincount(stay_key[booked] * bins + lead_bin,
+                                      minlength=cells * bins).reshape(month_count, type_count, bins)
+
+    def monthly_report(self, room_type: Optional[str] = None) -> List[Dict]:
+        if not self.months:
+            return []
+        if room_type is None:
+            columns = slice(None)
+        elif room_type in self.room_types:
+            columns = [self.room_types.index(room_type)]
+        else:
+            return []
+        nights_sold = self.nights_sold[:, columns].sum(axis=1)
+        revenue = self.revenue[:, columns].sum(axis=1)
+        available = self.available[:, columns].sum(axis=1)
+        stays = self.stays[:, columns].sum(axis=1)
+        stay_nights = self.stay_nights[:, columns].sum(axis=1)
+        lead_times = self.lead_times[:, columns, :].sum(axis=1)
+
+        report = []
+        for month, label in enumerate(self.months):
+            if not nights_sold[month] and not stays[month]:
+                continue
+            report.append({
+                "month": label,
+                "room_type": room_type,
+                "nights_sold": int(nights_sold[month]),
+                "revenue": float(revenue[month]),
+                "occupancy": float(nights_sold[month] / available[month] * 100) if available[month] else 0.0,
+                "adr": float(revenue[month] / nights_sold[month]) if nights_sold[month] else 0.0,
+                "revpar": float(revenue[month] / available[month]) if available[month] else 0.0,
+                "average_stay": float(stay_nights[month] / stays[month]) if stays[month] else 0.0,
+                "lead_time": dict(zip(self.LEAD_TIME_LABELS, (int(count) for count in lead_times[month])))
+            })
+        return report
+
+
+_EXPORT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "rooms": ("room_id", "room_type", "price", "status", "current_guest_id"),
+    "guests": ("guest_id", "name", "family", "national_id", "phone", "address"),
+    "reservations": ("reservation_id", "guest_id", "room_id", "check_in_date", "check_out_date", "status",
+                     "total_cost", "booking_date")
+}
+
+
+def _exchange_format(path: str, file_format: Optional[str]) -> str:
+    if file_format is None:
+        file_format = "csv" if path.lower().endswith(".csv") else "ndjson"
+    if file_format not in ["csv", "ndjson"]:
+        raise ValueError("قالب فایل داده‌ها نامعتبر است!")
+    return file_format
+
+
+def _read_exchange_rows(path: str, file_format: str) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if file_format == "csv":
+            import csv
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _field(record: Dict, name: str) -> str:
+    value = record.get(name)
+    return "" if value is None else str(value).strip()
+
+
+def _touched_ids(changes: Dict) -> set:
+    touched = {("rooms", room["room_id"]) for room in changes.get("rooms", [])}
+    touched.update(("rooms", room_id) for room_id in changes.get("deleted_rooms", []))
+    touched.update(("guests", guest["guest_id"]) for guest in changes.get("guests", []))
+    touched.update(("guests", guest_id) for guest_id in changes.get("deleted_guests", []))
+    for reservation in changes.get("reservations", []):
+        touched.update((("reservations", reservation["reservation_id"]), ("rooms", reservation["room_id"]),
+                        ("guests", reservation["guest_id"])))
+    return touched
+
+
+class ReadWriteLock:
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers: Dict[int, int] = {}
+        self._writer: Optional[int] = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+
+    @property
+    def write_owned(self) -> bool:
+        return self._writer == threading.get_ident()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                if self._readers[me] > 1:
+                    self._readers[me] -= 1
+                else:
+                    del self._readers[me]
+                    if not self._readers:
+                        self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me:
+                if me in self._readers:
+                    raise RuntimeError("قفل خواندن را نمی‌توان به قفل نوشتن تبدیل کرد!")
+                self._waiting_writers += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._condition.wait()
+                finally:
+                    self._waiting_writers -= 1
+                self._writer = me
+            self._writer_depth += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer_depth -= 1
+                if not self._writer_depth:
+                    self._writer = None
+                    self._condition.notify_all()
+
+
+class IdAllocator:
+    def __init__(self, start: int = 1):
+        self._lock = threading.Lock()
+        self._next = start
+
+    @property
+    def value(self) -> int:
+        return self._next
+
+    def allocate(self) -> int:
+        with self._lock:
+            allocated = self._next
+            self._next += 1
+            return allocated
+
+    def claim(self, value: int) -> bool:
+        with self._lock:
+            if value < self._next:
+                return False
+            self._next = value + 1
+            return True
+
+    def advance(self, value: int) -> None:
+        with self._lock:
+            self._next = max(self._next, value)
+
+    def reset(self, value: int = 1) -> None:
+        with self._lock:
+            self._next = value
+
+
+class _PendingWrite:
+    __slots__ = ("changes", "error")
+
+    def __init__(self, changes: Dict):
+        self.changes = changes
+        self.error: Optional[BaseException] = None
+
+
+class _WriteLog(threading.local):
+    def __init__(self):
+        self.entries: List[_PendingWrite] = []
+
+
+def _id_counter(table: str) -> property:
+    return property(lambda self: self._ids[table].value, lambda self, value: self._ids[table].reset(value))
+
+
+_CONFLICT_RETRIES = 3
+
+
+def _synchronized(method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._mutation():
+            if not self.storage.shared or self._in_mutation or self._pending is not None:
+                return method(self, *args, **kwargs)
+            for attempt in range(_CONFLICT_RETRIES):
+                self.refresh()
+                self._in_mutation = True
+                try:
+                    return method(self, *args, **kwargs)
+                except ConcurrentUpdateError:
+                    if attempt == _CONFLICT_RETRIES - 1:
+                        raise
+                finally:
+                    self._in_mutation = False
+    return wrapper
+
+
+def _transactional(method):
+    synchronized = _synchronized(method)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._storage_section():
+            return synchronized(self, *args, **kwargs)
+    return wrapper
+
+
+def _room_locked(by_reservation: bool = False):
+    def decorator(method):
+        id_name = list(inspect.signature(method).parameters)[1]
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            item_id = args[0] if args else kwargs.get(id_name)
+            room_id = self._reservation_room_id(item_id) if by_reservation else item_id
+            with self._room_lock(room_id):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class HotelManagementSystem:
+    next_room_id = _id_counter("rooms")
+    next_guest_id = _id_counter("guests")
+    next_reservation_id = _id_counter("reservations")
+
+    def __init__(self, data_file: str = "hotel_data.json", storage_mode: str = "snapshot",
+                 durability: str = "fsync", group_commit_ms: int = 50, snapshot_generations: int = 3,
+                 storage: Optional[StorageBackend] = None, archive_closed: bool = False,
+                 archive_dir: Optional[str] = None, shared: bool = False):
+        self.storage = storage or JsonStorage(data_file, "journal" if shared else storage_mode, durability,
+                                              group_commit_ms, snapshot_generations, shared=shared)
+        self.archive: Optional[ArchiveStore] = None
+        if archive_closed or archive_dir is not None:
+            self.archive = ArchiveStore(archive_dir)
+        self.archive_threshold = 1000
+        self._closed_in_memory = 0
+        self.rooms: List[Room] = []
+        self.guests: List[Guest] = []
+        self.reservations: List[Reservation] = []
+        self._rooms_by_id: Dict[str, Room] = {}
+        self._rooms_by_price: List[Tuple[float, str]] = []
+        self._rooms_by_type: Dict[str, List[Tuple[float, str]]] = {}
+        self._guests_by_id: Dict[str, Guest] = {}
+        self._reservations_by_id: Dict[str, Reservation] = {}
+        self._reservations_by_room: Dict[str, List[Reservation]] = {}
+        self._reservations_by_guest: Dict[str, List[Reservation]] = {}
+        self._reservations_by_status: Dict[str, Dict[str, Reservation]] = {}
+        self._active_by_room: Dict[str, Dict[str, Reservation]] = {}
+        self._active_by_guest: Dict[str, Dict[str, Reservation]] = {}
+        self._expiry_heap: List[Tuple[int, str]] = []
+        self._room_intervals: Dict[str, List[Tuple[int, int, str]]] = {}
+        self._occupancy = OccupancyCalendar()
+        self._income: Optional[IncomeLedger] = None
+        self._income_by_room: Dict[str, IncomeLedger] = {}
+        self._guest_index: Optional[GuestSearchIndex] = None
+        self._pending: Optional[Dict[str, Dict]] = None
+        self._in_mutation = False
+        self._imported_ids: Dict[str, Dict[str, Dict[str, str]]] = {}
+        self._ids: Dict[str, IdAllocator] = {table: IdAllocator() for table in _TABLE_KEYS}
+        self._lock = ReadWriteLock()
+        self._room_locks: Dict[str, threading.RLock] = {}
+        self._room_locks_guard = threading.Lock()
+        self._storage_lock = threading.RLock()
+        self._write_queue: Deque[_PendingWrite] = deque()
+        self._write_log = _WriteLog()
+        self._queued_writes = 0
+        self._written_writes = 0
+        self.load_error: Optional[str] = None
+        self.load_data()
+
+    @contextmanager
+    def _room_lock(self, room_id: Optional[str]) -> Iterator[None]:
+        if room_id is None or self._lock.write_owned:
+            yield
+            return
+        with self._room_locks_guard:
+            lock = self._room_locks.get(room_id)
+            if lock is None:
+                lock = self._room_locks[room_id] = threading.RLock()
+        with lock:
+            yield
+
+    @contextmanager
+    def _mutation(self) -> Iterator[None]:
+        if self._lock.write_owned:
+            yield
+            return
+        try:
+            with self._lock.write():
+                yield
+        finally:
+            self._commit_writes()
+
+    @contextmanager
+    def _storage_section(self) -> Iterator[None]:
+        with self._storage_lock:
+            self._drain_writes()
+            yield
+
+    def _drain_writes(self) -> None:
+        while self._write_queue:
+            batch = [self._write_queue.popleft() for _ in range(len(self._write_queue))]
+            try:
+                self.storage.write_batch([entry.changes for entry in batch], self._snapshot_data)
+            except Exception as e:
+                for entry in batch:
+                    entry.error = e
+            self._written_writes += len(batch)
+
+    def _commit_writes(self) -> None:
+        if self._written_writes < self._queued_writes:
+            with self._storage_lock:
+                self._drain_writes()
+        entries, self._write_log.entries = self._write_log.entries, []
+        for entry in entries:
+            if entry.error is not None:
+                raise entry.error
+        if self.archive is not None and self._closed_in_memory >= max(self.archive_threshold,
+                                                                       len(self.reservations) // 2):
+            self.archive_closed_reservations()
+
+    def _reservation_room_id(self, reservation_id: str) -> Optional[str]:
+        with self._lock.read():
+            reservation = self.get_reservation(reservation_id)
+        return reservation.room_id if reservation is not None else None
+
+    def _rebuild_indexes(self) -> None:
+        self._rebuild_room_indexes()
+        self._guests_by_id = {guest.guest_id: guest for guest in self.guests}
+        self._guest_index = None
+        self._rebuild_reservation_indexes()
+
+    def _rebuild_room_indexes(self) -> None:
+        self._rooms_by_id = {}
+        self._rooms_by_price = []
+        self._rooms_by_type = {}
+        for room in self.rooms:
+            self._index_room(room)
+
+    def _rebuild_reservation_indexes(self) -> None:
+        self._closed_in_memory = 0
+        self._reservations_by_id = {}
+        self._reservations_by_room = {}
+        self._reservations_by_guest = {}
+        self._reservations_by_status = {}
+        self._active_by_room = {}
+        self._active_by_guest = {}
+        self._expiry_heap = []
+        self._room_intervals = {}
+        self._occupancy = OccupancyCalendar()
+        for reservation in self.reservations:
+            self._index_reservation(reservation)
+
+    def _index_room(self, room: Room) -> None:
+        self._rooms_by_id[room.room_id] = room
+        key = (room.price, room.room_id)
+        bisect.insort(self._rooms_by_price, key)
+        bisect.insort(self._rooms_by_type.setdefault(room.room_type, []), key)
+
+    def _unindex_room(self, room: Room) -> None:
+        self._rooms_by_id.pop(room.room_id, None)
+        key = (room.price, room.room_id)
+        for index in (self._rooms_by_price, self._rooms_by_type.get(room.room_type, [])):
+            i = bisect.bisect_left(index, key)
+            if i < len(index) and index[i] == key:
+                del index[i]
+
+    def _index_reservation(self, reservation: Reservation) -> None:
+        reservation_id = reservation.reservation_id
+        self._reservations_by_id[reservation_id] = reservation
+        self._reservations_by_room.setdefault(reservation.room_id, []).append(reservation)
+        self._reservations_by_guest.setdefault(reservation.guest_id, []).append(reservation)
+        self._reservations_by_status.setdefault(reservation.status, {})[reservation_id] = reservation
+        if reservation.status == "فعال":
+            self._active_by_room.setdefault(reservation.room_id, {})[reservation_id] = reservation
+            self._active_by_guest.setdefault(reservation.guest_id, {})[reservation_id] = reservation
+            self._add_interval(reservation)
+            self._schedule_expiry(reservation)
+        else:
+            self._closed_in_memory += 1
+
+    def _schedule_expiry(self, reservation: Reservation) -> None:
+        check_out = reservation.check_out_day
+        if check_out is None:
+            notify(f"خطا در تاریخ رزرو {reservation.reservation_id}: فرمت تاریخ نامعتبر است!", "error")
+            check_out = 0
+        heapq.heappush(self._expiry_heap, (check_out, reservation.reservation_id))
+
+    def _set_reservation_status(self, reservation: Reservation, status: str) -> None:
+        reservation_id = reservation.reservation_id
+        if reservation.status == status:
+            return
+        self._reservations_by_status.get(reservation.status, {}).pop(reservation_id, None)
+        if reservation.status == "فعال":
+            self._active_by_room.get(reservation.room_id, {}).pop(reservation_id, None)
+            self._active_by_guest.get(reservation.guest_id, {}).pop(reservation_id, None)
+            self._remove_interval(reservation)
+            self._closed_in_memory += 1
+        reservation.status = status
+        self._reservations_by_status.setdefault(status, {})[reservation_id] = reservation
+        if status == "فعال":
+            self._active_by_room.setdefault(reservation.room_id, {})[reservation_id] = reservation
+            self._active_by_guest.setdefault(reservation.guest_id, {})[reservation_id] = reservation
+            self._add_interval(reservation)
+            self._closed_in_memory -= 1
+
+    def _add_interval(self, reservation: Reservation) -> None:
+        start = reservation.check_in_day
+        end = reservation.check_out_day
+        if start is None or end is None:
+            return
+        bisect.insort(self._room_intervals.setdefault(reservation.room_id, []),
+                      (start, end, reservation.reservation_id))
+        self._occupancy.add(reservation, self._room_type_of(reservation.room_id))
+
+    def _remove_interval(self, reservation: Reservation) -> None:
+        intervals = self._room_intervals.get(reservation.room_id, [])
+        for i, (_, _, reservation_id) in enumerate(intervals):
+            if reservation_id == reservation.reservation_id:
+                del intervals[i]
+                self._occupancy.remove(reservation, self._room_type_of(reservation.room_id))
+                break
+
+    def _room_type_of(self, room_id: str) -> str:
+        room = self._rooms_by_id.get(room_id)
+        return room.room_type if room else "نامشخص"
+
+    def _is_room_free(self, room_id: str, start: int, end: int) -> bool:
+        intervals = self._room_intervals.get(room_id)
+        if not intervals:
+            return True
+        i = bisect.bisect_left(intervals, (end,))
+        return i == 0 or intervals[i - 1][1] <= start
+
+    def _room_fit(self, room_id: str, start: int, end: int) -> Optional[float]:
+        intervals = self._room_intervals.get(room_id) or []
+        i = bisect.bisect_left(intervals, (end,))
+        if i > 0 and intervals[i - 1][1] > start:
+            return None
+        gaps = []
+        if i > 0:
+            gaps.append(start - intervals[i - 1][1])
+        if i < len(intervals):
+            gaps.append(intervals[i][0] - end)
+        return min(gaps) if gaps else float("inf")
+
+    def is_room_available(self, room_id: str, check_in_date: str, check_out_date: str) -> bool:
+        room = self.get_room(room_id)
+        start = _date_ordinal(check_in_date)
+        end = _date_ordinal(check_out_date)
+        if not room or room.status not in ["خالی", "رزرو شده", "اشغال شده"]:
+            return False
+        if start is None or end is None or end <= start:
+            return False
+        with self._lock.read():
+            return self._is_room_free(room_id, start, end)
+
+    def get_room_active_reservations(self, room_id: str) -> List[Reservation]:
+        with self._lock.read():
+            return list(self._active_by_room.get(room_id, {}).values())
+
+    def get_guest_active_reservations(self, guest_id: str) -> List[Reservation]:
+        with self._lock.read():
+            return list(self._active_by_guest.get(guest_id, {}).values())
+
+    def update_room_status(self) -> None:
+        self.refresh()
+        with self._lock.read():
+            if not self._expiry_heap or self._expiry_heap[0][0] >= today_day():
+                return
+        with self._mutation():
+            expired = self._expire_reservations()
+            if expired:
+                self._persist(rooms=self._rooms_of(expired), reservations=expired)
+
+    def _expire_reservations(self) -> List[Reservation]:
+        today = today_day()
+        expired = []
+        while self._expiry_heap and self._expiry_heap[0][0] < today:
+            _, reservation_id = heapq.heappop(self._expiry_heap)
+            reservation = self._reservations_by_id.get(reservation_id)
+            if reservation is None or reservation.status != "فعال":
+                continue
+            self._set_reservation_status(reservation, "منقضی شده")
+            room = self._rooms_by_id.get(reservation.room_id)
+            if room is not None:
+                self._release_room(room, reservation.guest_id)
+            expired.append(reservation)
+        return expired
+
+    def _release_room(self, room: Room, guest_id: str) -> None:
+        active = self._active_by_room.get(room.room_id, {})
+        if room.current_guest_id == guest_id and all(res.guest_id != guest_id for res in active.values()):
+            room.current_guest_id = None
+        if room.current_guest_id is None and room.status in ["رزرو شده", "اشغال شده"]:
+            room.status = "رزرو شده" if active else "خالی"
+
+    def _reconcile_room_statuses(self) -> List[Room]:
+        stale_rooms = []
+        for room in self.rooms:
+            if room.status in ["رزرو شده", "اشغال شده"] and not self._active_by_room.get(room.room_id):
+                room.status = "خالی"
+                room.current_guest_id = None
+                stale_rooms.append(room)
+        return stale_rooms
+
+    def _rooms_of(self, reservations: Iterable[Reservation]) -> List[Room]:
+        rooms = {}
+        for reservation in reservations:
+            room = self._rooms_by_id.get(reservation.room_id)
+            if room is not None:
+                rooms[room.room_id] = room
+        return list(rooms.values())
+
+    def _split_closed(self, reservations: List[Reservation]) -> List[Reservation]:
+        active = []
+        closed = []
+        for reservation in reservations:
+            if reservation.status == "فعال":
+                active.append(reservation)
+            else:
+                closed.append(reservation)
+        self.archive.extend(closed)
+        return active
+
+    def archive_closed_reservations(self) -> int:
+        with self._storage_section(), self._lock.write():
+            if self.archive is None or not self._closed_in_memory:
+                return 0
+            archived = self._closed_in_memory
+            self.reservations = self._split_closed(self.reservations)
+            self._rebuild_reservation_indexes()
+            self._save_hot_snapshot()
+            return archived
+
+    def _save_hot_snapshot(self) -> None:
+        if self.archive is not None and self.archive.persistent and self.storage.loads_history:
+            self.storage.save(self._snapshot_data())
+
+    def _snapshot_data(self) -> Dict:
+        with self._lock.read():
+            reservations = [reservation.to_dict() for reservation in self.reservations]
+            if self.archive is not None and not self.archive.persistent:
+                reservations = list(self.archive.iter_dicts()) + reservations
+            return {
+                "rooms": [room.to_dict() for room in self.rooms],
+                "guests": [guest.to_dict() for guest in self.guests],
+                "reservations": reservations,
+                "next_room_id": self.next_room_id,
+                "next_guest_id": self.next_guest_id,
+                "next_reservation_id": self.next_reservation_id,
+                "imported_ids": copy.deepcopy(self._imported_ids)
+            }
+
+    def save_data(self) -> None:
+        with self._storage_section(), self._lock.write(), self.storage.lock():
+            self._merge_remote(self.storage.poll())
+            self.storage.save(self._snapshot_data())
+        notify("فایل داده‌ها با موفقیت ذخیره شد.", "success")  # برای دیباگ
+
+    def _persist(self, rooms: Iterable[Room] = (), guests: Iterable[Guest] = (),
+                 reservations: Iterable[Reservation] = (), deleted_rooms: Iterable[str] = (),
+                 deleted_guests: Iterable[str] = (), imported_ids: Optional[Dict] = None) -> None:
+        if self._pending is not None:
+            if imported_ids:
+                _merge_imported_ids(self._pending["imported_ids"], imported_ids)
+            for table, key, items in (("rooms", "room_id", rooms), ("guests", "guest_id", guests),
+                                      ("reservations", "reservation_id", reservations)):
+                self._pending[table].update((getattr(item, key), item) for item in items)
+            for table, field, item_ids in (("rooms", "deleted_rooms", deleted_rooms),
+                                           ("guests", "deleted_guests", deleted_guests)):
+                for item_id in item_ids:
+                    self._pending[table].pop(item_id, None)
+                    self._pending[field][item_id] = None
+            return
+        changes = {
+            "next_room_id": self.next_room_id,
+            "next_guest_id": self.next_guest_id,
+            "next_reservation_id": self.next_reservation_id
+        }
+        if rooms:
+            changes["rooms"] = [room.to_dict() for room in rooms]
+        if guests:
+            changes["guests"] = [guest.to_dict() for guest in guests]
+        if reservations:
+            changes["reservations"] = [reservation.to_dict() for reservation in reservations]
+        if deleted_rooms:
+            changes["deleted_rooms"] = list(deleted_rooms)
+        if deleted_guests:
+            changes["deleted_guests"] = list(deleted_guests)
+        if imported_ids:
+            changes["imported_ids"] = copy.deepcopy(imported_ids)
+        if not self.storage.shared:
+            entry = _PendingWrite(changes)
+            self._write_queue.append(entry)
+            self._write_log.entries.append(entry)
+            self._queued_writes += 1
+            return
+        try:
+            with self.storage.lock():
+                self._merge_remote(self.storage.poll(), changes)
+                self.storage.write(changes, self._snapshot_data)
+        except ConcurrentUpdateError:
+            self._rollback()
+            raise
+
+    @contextmanager
+    def transaction(self) -> Iterator["HotelManagementSystem"]:
+        with self._storage_section(), self._mutation():
+            if self._pending is not None:
+                yield self
+                return
+            self.refresh()
+            self._pending = {"rooms": {}, "guests": {}, "reservations": {}, "deleted_rooms": {},
+                             "deleted_guests": {}, "imported_ids": {}}
+            try:
+                yield self
+            except BaseException:
+                self._pending = None
+                self._rollback()
+                raise
+            pending, self._pending = self._pending, None
+            self._persist(rooms=pending["rooms"].values(), guests=pending["guests"].values(),
+                          reservations=pending["reservations"].values(), deleted_rooms=pending["deleted_rooms"],
+                          deleted_guests=pending["deleted_guests"], imported_ids=pending["imported_ids"])
+
+    def _rollback(self) -> None:
+        self._drain_writes()
+        self.rooms, self.guests, self.reservations = [], [], []
+        self._imported_ids = {}
+        for allocator in self._ids.values():
+            allocator.reset()
+        self._income = None
+        self._rebuild_indexes()
+        data = self.storage.load()
+        if data is not None:
+            self._load_records(data)
+
+    def refresh(self) -> None:
+        if not self.storage.shared:
+            return
+        with self._lock.write():
+            if not self._in_mutation and self._pending is None:
+                self._merge_remote(self.storage.poll())
+
+    def _merge_remote(self, records: Optional[List[Dict]], changes: Optional[Dict] = None) -> None:
+        if records is None or (changes is not None and records and
+                               _touched_ids(changes) & set().union(*map(_touched_ids, records))):
+            if changes is not None:
+                raise ConcurrentUpdateError("اطلاعات توسط پایانه دیگری تغییر کرده است، دوباره تلاش کنید!")
+            self._rollback()
+            return
+        reservations_changed = False
+        added: Dict[str, Reservation] = {}
+        for record in records:
+            for data in record.get("rooms", []):
+                room = self._rooms_by_id.get(data["room_id"])
+                if room is None:
+                    room = Room.from_dict(data)
+                    self.rooms.append(room)
+                else:
+                    self._unindex_room(room)
+                    reservations_changed |= room.room_type != data["room_type"]
+                    room.room_type = sys.intern(data["room_type"])
+                    room.price = data.get("price", room.price)
+                    room.status = sys.intern(data["status"])
+                    room.current_guest_id = data.get("current_guest_id")
+                self._index_room(room)
+            for room_id in record.get("deleted_rooms", []):
+                room = self._rooms_by_id.get(room_id)
+                if room is not None:
+                    self._unindex_room(room)
+                    self.rooms.remove(room)
+            for data in record.get("guests", []):
+                guest = self._guests_by_id.get(data["guest_id"])
+                if guest is None:
+                    guest = Guest.from_dict(data)
+                    self.guests.append(guest)
+                    self._guests_by_id[guest.guest_id] = guest
+                else:
+                    guest.name, guest.family = data["name"], data.get("family", "")
+                    guest.national_id, guest.phone = data["national_id"], data["phone"]
+                    guest.address = data.get("address", "")
+                if self._guest_index is not None:
+                    self._guest_index.update(guest)
+            for guest_id in record.get("deleted_guests", []):
+                guest = self._guests_by_id.pop(guest_id, None)
+                if guest is not None:
+                    self.guests.remove(guest)
+                    if self._guest_index is not None:
+                        self._guest_index.remove(guest_id)
+            for data in record.get("reservations", []):
+                reservation = self._reservations_by_id.get(data["reservation_id"]) or \
+                    added.get(data["reservation_id"])
+                if reservation is None:
+                    reservation = added[data["reservation_id"]] = Reservation.from_dict(data)
+                    self.reservations.append(reservation)
+                else:
+                    reservation.check_in_date = data["check_in_date"]
+                    reservation.check_out_date = data["check_out_date"]
+                    reservation.status = data["status"]
+                    reservation.total_cost = data.get("total_cost", 0.0)
+                    reservation.booking_date = data.get("booking_date")
+                reservations_changed = True
+            self._ids["rooms"].advance(record.get("next_room_id", 1))
+            self._ids["guests"].advance(record.get("next_guest_id", 1))
+            self._ids["reservations"].advance(record.get("next_reservation_id", 1))
+            _merge_imported_ids(self._imported_ids, record.get("imported_ids", {}))
+        if reservations_changed:
+            self._rebuild_reservation_indexes()
+            self._income = None
+        if changes is not None:
+            changes.update(next_room_id=self.next_room_id, next_guest_id=self.next_guest_id,
+                           next_reservation_id=self.next_reservation_id)
+
+    def compact(self) -> None:
+        with self._storage_section(), self._lock.write(), self.storage.lock():
+            self._merge_remote(self.storage.poll())
+            self.storage.compact(self._snapshot_data)
+
+    def close(self) -> None:
+        with self._storage_section(), self._lock.write():
+            self.storage.close()
+
+    def load_data(self) -> None:
+        with self._storage_section(), self._lock.write():
+            self.load_error = None
+            try:
+                self._income = None
+                data = self.storage.load()
+                if data is None:
+                    notify("فایل داده‌ها یافت نشد، یک فایل جدید ایجاد می‌شود.", "info")
+                    return
+                self._load_records(data)
+                self._commit_writes()
+            except json.JSONDecodeError:
+                self.load_error = "فایل داده‌ها ساختار معتبر JSON ندارد!"
+            except KeyError as e:
+                self.load_error = f"کلید {e} در فایل داده‌ها یافت نشد!"
+            except Exception as e:
+                self.load_error = f"خطا در بارگذاری داده‌ها: {e}"
+            if self.load_error is not None:
+                notify(self.load_error, "error")
+
+    def _load_records(self, data: Dict) -> None:
+        rooms: List[Room] = []
+        guests: List[Guest] = []
+        reservations: List[Reservation] = []
+        archive = self.archive
+        if archive is not None and not archive.persistent:
+            archive = ArchiveStore()
+        closed: List[Reservation] = []
+        archived = False
+        for table, record in _iter_records(data):
+            if table == "rooms":
+                rooms.append(Room.from_dict(record))
+            elif table == "guests":
+                guests.append(Guest.from_dict(record))
+            elif table == "reservations":
+                reservation = Reservation.from_dict(record)
+                if archive is None or reservation.status == "فعال":
+                    reservations.append(reservation)
+                    continue
+                closed.append(reservation)
+                if len(closed) >= self.archive_threshold:
+                    archive.extend(closed)
+                    closed = []
+                    archived = True
+        if closed:
+            archive.extend(closed)
+            archived = True
+        moved_to_disk = archived and archive.persistent
+        self.rooms, self.guests, self.reservations, self.archive = rooms, guests, reservations, archive
+        self.next_room_id = data.get("next_room_id", 1)
+        self.next_guest_id = data.get("next_guest_id", 1)
+        self.next_reservation_id = data.get("next_reservation_id", 1)
+        self._imported_ids = copy.deepcopy(data.get("imported_ids", {}))
+        self._rebuild_indexes()
+        expired = self._expire_reservations()
+        stale_rooms = self._reconcile_room_statuses()
+        if expired or stale_rooms:
+            self._persist(rooms=self._rooms_of(expired) + stale_rooms, reservations=expired)
+        if moved_to_disk:
+            self._save_hot_snapshot()
+
+    @_synchronized
+    def add_room(self, room_type: str, price: float) -> Room:
+        room_id = str(self._ids["rooms"].allocate())
+        room = Room(room_id=room_id, room_type=room_type, price=price)
+        self.rooms.append(room)
+        self._index_room(room)
+        self._persist(rooms=[room])
+        return room
+
+    @_transactional
+    def add_rooms(self, rooms: Iterable[Dict]) -> List[Room]:
+        with self.transaction():
+            return [self.add_room(**room) for room in rooms]
+
+    @_room_locked()
+    @_synchronized
+    def delete_room(self, room_id: str) -> bool:
+        if self._active_by_room.get(room_id):
+            return False
+        room = self._rooms_by_id.get(room_id)
+        if room is None:
+            return False
+        self._unindex_room(room)
+        self.rooms.remove(room)
+        self._persist(deleted_rooms=[room_id])
+        return True
+
+    @_room_locked()
+    @_synchronized
+    def edit_room(self, room_id: str, room_type: Optional[str] = None,
+                  price: Optional[float] = None, status: Optional[str] = None) -> bool:
+        room = self._rooms_by_id.get(room_id)
+        if room is None:
+            return False
+        self._unindex_room(room)
+        if room_type is not None and room_type != room.room_type:
+            active = list(self._active_by_room.get(room_id, {}).values())
+            for reservation in active:
+                self._occupancy.remove(reservation, room.room_type)
+            room.room_type = room_type
+            for reservation in active:
+                self._occupancy.add(reservation, room_type)
+        if price is not None:
+            room.price = price
+        if status is not None:
+            room.status = status
+        self._index_room(room)
+        self._persist(rooms=[room])
+        return True
+
+    def get_room(self, room_id: str) -> Optional[Room]:
+        return self._rooms_by_id.get(room_id)
+
+    def get_all_rooms(self) -> List[Room]:
+        self.update_room_status()
+        with self._lock.read():
+            return list(self.rooms)
+
+    def get_available_rooms(self) -> List[Room]:
+        self.update_room_status()
+        with self._lock.read():
+            return [room for room in self.rooms if room.status == "خالی"]
+
+    def search_available_rooms(self, check_in_date: str, check_out_date: str, room_type: Optional[str] = None,
+                               min_price: Optional[float] = None, max_price: Optional[float] = None,
+                               limit: Optional[int] = None) -> List[Room]:
+        self.update_room_status()
+        start = _date_ordinal(check_in_date)
+        end = _date_ordinal(check_out_date)
+        if start is None or end is None or end <= start or start < today_day():
+            return []
+        candidates = []
+        with self._lock.read():
+            index = self._rooms_by_price if room_type is None else self._rooms_by_type.get(room_type, [])
+            lo = 0 if min_price is None else bisect.bisect_left(index, (min_price,))
+            hi = len(index) if max_price is None else bisect.bisect_right(index, (max_price, "\U0010ffff"))
+            for price, room_id in index[lo:hi]:
+                room = self._rooms_by_id[room_id]
+                if room.status not in ["خالی", "رزرو شده", "اشغال شده"]:
+                    continue
+                fit = self._room_fit(room_id, start, end)
+                if fit is not None:
+                    candidates.append((price, fit, room))
+        candidates.sort(key=lambda candidate: (candidate[0], candidate[1]))
+        rooms = [room for _, _, room in candidates]
+        return rooms[:limit] if limit is not None else rooms
+
+    @_synchronized
+    def add_guest(self, name: str, family: str, national_id: str, phone: str, address: str = "") -> Guest:
+        if not name.strip():
+            raise ValueError("نام نمی‌تواند خالی باشد!")
+        if not family.strip():
+            raise ValueError("نام خانوادگی نمی‌تواند خالی باشد!")
+        if not _NATIONAL_ID_PATTERN.match(national_id):
+            raise ValueError("کد ملی باید ۱۰ رقم باشد!")
+        if not _PHONE_PATTERN.match(phone):
+            raise ValueError("شماره تلفن باید ۱۱ رقم و با 09 شروع شود!")
+
+        guest_id = str(self._ids["guests"].allocate())
+        guest = Guest(guest_id=guest_id, name=name.strip(), family=family.strip(),
+                      national_id=national_id, phone=phone, address=address)
+        self.guests.append(guest)
+        self._guests_by_id[guest_id] = guest
+        if self._guest_index is not None:
+            self._guest_index.add(guest)
+        self._persist(guests=[guest])
+        return guest
+
+    @_transactional
+    def add_guests(self, guests: Iterable[Dict]) -> List[Guest]:
+        with self.transaction():
+            return [self.add_guest(**guest) for guest in guests]
+
+    @_synchronized
+    def edit_guest(self, guest_id: str, name: Optional[str] = None, family: Optional[str] = None,
+                   national_id: Optional[str] = None, phone: Optional[str] = None,
+                   address: Optional[str] = None) -> bool:
+        guest = self._guests_by_id.get(guest_id)
+        if guest is None:
+            return False
+        try:
+            if name is not None:
+                if not name.strip():
+                    raise ValueError("نام نمی‌تواند خالی باشد!")
+                guest.name = name.strip()
+            if family is not None:
+                if not family.strip():
+                    raise ValueError("نام خانوادگی نمی‌تواند خالی باشد!")
+                guest.family = family.strip()
+            if national_id is not None:
+                if not _NATIONAL_ID_PATTERN.match(national_id):
+                    raise ValueError("کد ملی باید ۱۰ رقم باشد!")
+                guest.national_id = national_id
+            if phone is not None:
+                if not _PHONE_PATTERN.match(phone):
+                    raise ValueError("شماره تلفن باید ۱۱ رقم و با 09 شروع شود!")
+                guest.phone = phone
+            if address is not None:
+                guest.address = address
+        finally:
+            if self._guest_index is not None:
+                self._guest_index.update(guest)
+        self._persist(guests=[guest])
+        return True
+
+    @_synchronized
+    def delete_guest(self, guest_id: str) -> bool:
+        if self._active_by_guest.get(guest_id):
+            return False
+        guest = self._guests_by_id.pop(guest_id, None)
+        if guest is None:
+            return False
+        self.guests.remove(guest)
+        if self._guest_index is not None:
+            self._guest_index.remove(guest_id)
+        self._persist(deleted_guests=[guest_id])
+        return True
+
+    def get_guest(self, guest_id: str) -> Optional[Guest]:
+        return self._guests_by_id.get(guest_id)
+
+    def get_all_guests(self) -> List[Guest]:
+        self.refresh()
+        with self._lock.read():
+            return list(self.guests)
+
+    def search_guests(self, query: str, limit: Optional[int] = None) -> List[Guest]:
+        self.refresh()
+        index = self._guest_index
+        if index is None:
+            with self._lock.write():
+                index = self._guest_index
+                if index is None:
+                    index = self._guest_index = GuestSearchIndex(self.guests)
+        with self._lock.read():
+            return index.search(query, limit)
+
+    def make_reservation(self, guest_id: str, room_id: str,
+                         check_in_date: str, check_out_date: str) -> Optional[Reservation]:
+        with self._room_lock(room_id):
+            self.refresh()
+            with self._lock.read():
+                if self._reservation_days(guest_id, room_id, check_in_date, check_out_date) is None:
+                    return None
+            return self._reserve(guest_id, room_id, check_in_date, check_out_date)
+
+    def _reservation_days(self, guest_id: str, room_id: str,
+                          check_in_date: str, check_out_date: str) -> Optional[int]:
+        guest = self.get_guest(guest_id)
+        room = self.get_room(room_id)
+
+        if not guest:
+            return None
+        if not room:
+            return None
+        if room.status not in ["خالی", "رزرو شده", "اشغال شده"]:
+            return None
+
+        try:
+            check_in = parse_day(check_in_date)
+            check_out = parse_day(check_out_date)
+        except ValueError:
+            return None
+
+        if check_in < today_day():
+            return None
+        if check_out <= check_in:
+            return None
+        if not self._is_room_free(room_id, check_in, check_out):
+            return None
+        return check_out - check_in
+
+    @_synchronized
+    def _reserve(self, guest_id: str, room_id: str,
+                 check_in_date: str, check_out_date: str) -> Optional[Reservation]:
+        days = self._reservation_days(guest_id, room_id, check_in_date, check_out_date)
+        if days is None:
+            return None
+        room = self._rooms_by_id[room_id]
+
+        reservation_id = str(self._ids["reservations"].allocate())
+        reservation = Reservation(
+            reservation_id=reservation_id,
+            guest_id=guest_id,
+            room_id=room_id,
+            check_in_date=check_in_date,
+            check_out_date=check_out_date,
+            booking_date=jalali_today()
+        )
+
+        reservation.total_cost = days * room.price
+        if room.status == "خالی":
+            room.status = "رزرو شده"
+
+        self.reservations.append(reservation)
+        self._index_reservation(reservation)
+        self._persist(rooms=[room], reservations=[reservation])
+        return reservation
+
+    @_transactional
+    def make_reservations(self, reservations: Iterable[Dict]) -> List[Reservation]:
+        made = []
+        with self.transaction():
+            for row, request in enumerate(reservations, 1):
+                reservation = self.make_reservation(**request)
+                if reservation is None:
+                    raise ValueError(f"رزرو ردیف {row} امکان‌پذیر نیست!")
+                made.append(reservation)
+        return made
+
+    @_transactional
+    def import_records(self, table: str, path: str, file_format: Optional[str] = None,
+                       chunk_size: int = 10000, source: str = "") -> Tuple[int, List[Tuple[int, str]]]:
+        importers = {"rooms": self._import_room, "guests": self._import_guest,
+                     "reservations": self._import_reservation}
+        if table not in importers:
+            raise ValueError("نوع داده نامعتبر است!")
+        importer = importers[table]
+        rows = enumerate(_read_exchange_rows(path, _exchange_format(path, file_format)), 1)
+        national_ids = {guest.national_id: guest.guest_id for guest in self.guests}
+        imported = 0
+        errors: List[Tuple[int, str]] = []
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            with self.transaction():
+                for row, record in chunk:
+                    try:
+                        importer(record, source, national_ids)
+                        imported += 1
+                    except ValueError as e:
+                        errors.append((row, str(e)))
+        if table == "reservations":
+            self._income = None
+            self.update_room_status()
+        return imported, errors
+
+    def _import_id(self, table: str, source: str, source_id: str) -> str:
+        if self._ids[table].claim(_id_code(source_id)):
+            return source_id
+        item_id = str(self._ids[table].allocate())
+        if source_id:
+            imported_ids = {source: {table: {source_id: item_id}}}
+            _merge_imported_ids(self._imported_ids, imported_ids)
+            self._persist(imported_ids=imported_ids)
+        return item_id
+
+    def _imported_id(self, table: str, source: str, source_id: str) -> str:
+        return self._imported_ids.get(source, {}).get(table, {}).get(source_id, source_id)
+
+    def _import_room(self, record: Dict, source: str, national_ids: Dict[str, str]) -> None:
+        room_type = _field(record, "room_type")
+        if not room_type:
+            raise ValueError("نوع اتاق نمی‌تواند خالی باشد!")
+        try:
+            price = float(_field(record, "price") or 5000000)
+        except ValueError:
+            raise ValueError("قیمت نامعتبر است!") from None
+        if price <= 0:
+            raise ValueError("قیمت باید بیشتر از صفر باشد!")
+        room = Room(room_id=self._import_id("rooms", source, _field(record, "room_id")), room_type=sys.intern(room_type),
+                    price=price)
+        self.rooms.append(room)
+        self._index_room(room)
+        self._persist(rooms=[room])
+
+    def _import_guest(self, record: Dict, source: str, national_ids: Dict[str, str]) -> None:
+        name, family = _field(record, "name"), _field(record, "family")
+        national_id, phone = _field(record, "national_id"), _field(record, "phone")
+        if not name:
+            raise ValueError("نام نمی‌تواند خالی باشد!")
+        if not family:
+            raise ValueError("نام خانوادگی نمی‌تواند خالی باشد!")
+        if not _NATIONAL_ID_PATTERN.match(national_id):
+            raise ValueError("کد ملی باید ۱۰ رقم باشد!")
+        if not _PHONE_PATTERN.match(phone):
+            raise ValueError("شماره تلفن باید ۱۱ رقم و با 09 شروع شود!")
+        guest = Guest(guest_id=self._import_id("guests", source, _field(record, "guest_id")), name=name, family=family,
+                      national_id=national_id, phone=phone, address=_field(record, "address"))
+        self.guests.append(guest)
+        self._guests_by_id[guest.guest_id] = guest
+        if self._guest_index is not None:
+            self._guest_index.add(guest)
+        national_ids.setdefault(national_id, guest.guest_id)
+        self._persist(guests=[guest])
+
+    def _import_reservation(self, record: Dict, source: str, national_ids: Dict[str, str]) -> None:
+        guest_id = self._imported_id("guests", source, _field(record, "guest_id")) or \
+            national_ids.get(_field(record, "national_id"), "")
+        room_id = self._imported_id("rooms", source, _field(record, "room_id"))
+        if guest_id not in self._guests_by_id:
+            raise ValueError("مهمان یافت نشد!")
+        room = self._rooms_by_id.get(room_id)
+        if room is None:
+            raise ValueError("اتاق یافت نشد!")
+        check_in = _date_ordinal(_field(record, "check_in_date"))
+        check_out = _date_ordinal(_field(record, "check_out_date"))
+        if check_in is None or check_out is None:
+            raise ValueError("فرمت تاریخ نامعتبر است!")
+        if check_out <= check_in:
+            raise ValueError("تاریخ خروج باید بعد از تاریخ ورود باشد!")
+        status = _field(record, "status") or "فعال"
+        if status not in _RESERVATION_STATUSES:
+            raise ValueError("وضعیت رزرو نامعتبر است!")
+        booking_date = _field(record, "booking_date")
+        booking_day = _date_ordinal(booking_date) if booking_date else None
+        if booking_date and booking_day is None:
+            raise ValueError("فرمت تاریخ نامعتبر است!")
+        try:
+            total_cost = float(_field(record, "total_cost") or (check_out - check_in) * room.price)
+        except ValueError:
+            raise ValueError("مبلغ نامعتبر است!") from None
+        if status == "فعال" and not self._is_room_free(room_id, check_in, check_out):
+            raise ValueError("اتاق در این بازه زمانی رزرو شده است!")
+        reservation = Reservation(
+            reservation_id=self._import_id("reservations", source, _field(record, "reservation_id")),
+            guest_id=guest_id,
+            room_id=room_id,
+            check_in_date=format_day(check_in),
+            check_out_date=format_day(check_out),
+            status=status,
+            booking_date=format_day(booking_day) if booking_day is not None else None
+        )
+        reservation.total_cost = total_cost
+        if status == "فعال" and room.status == "خالی":
+            room.status = "رزرو شده"
+        self.reservations.append(reservation)
+        self._index_reservation(reservation)
+        self._persist(rooms=[room], reservations=[reservation])
+
+    def export_records(self, table: str, path: str, file_format: Optional[str] = None) -> int:
+        if table not in _EXPORT_FIELDS:
+            raise ValueError("نوع داده نامعتبر است!")
+        file_format = _exchange_format(path, file_format)
+        if table == "reservations":
+            self.update_room_status()
+        exported = 0
+        with self._lock.read(), open(path, "w", encoding="utf-8", newline="") as f:
+            if table == "rooms":
+                records = (room.to_dict() for room in self.rooms)
+            elif table == "guests":
+                records = (guest.to_dict() for guest in self.guests)
+            else:
+                records = self._iter_reservation_dicts()
+            if file_format == "csv":
+                import csv
+                writer = csv.DictWriter(f, fieldnames=_EXPORT_FIELDS[table], extrasaction="ignore")
+                writer.writeheader()
+                for record in records:
+                    writer.writerow(record)
+                    exported += 1
+            else:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+                    exported += 1
+        return exported
+
+    def _iter_reservation_dicts(self) -> Iterable[Dict]:
+        if not self.storage.loads_history:
+            return self.storage.iter_reservations()
+        archived = self.archive.iter_dicts() if self.archive is not None else ()
+        return itertools.chain(archived, (reservation.to_dict() for reservation in self.reservations))
+
+    @_room_locked(by_reservation=True)
+    @_synchronized
+    def check_in(self, reservation_id: str) -> bool:
+        reservation = self.get_reservation(reservation_id)
+        if not reservation or reservation.status != "فعال":
+            return False
+        room = self.get_room(reservation.room_id)
+        guest = self.get_guest(reservation.guest_id)
+        if not room or not guest:
+            return False
+        if room.status == "اشغال شده" and room.current_guest_id != reservation.guest_id:
+            return False
+
+        if reservation.check_in_day is None or today_day() < reservation.check_in_day:
+            return False
+
+        room.status = "اشغال شده"
+        room.current_guest_id = reservation.guest_id
+        self._persist(rooms=[room])
+        return True
+
+    @_room_locked(by_reservation=True)
+    @_synchronized
+    def check_out(self, reservation_id: str) -> Union[float, bool]:
+        reservation = self.get_reservation(reservation_id)
+        if not reservation or reservation.status != "فعال":
+            return False
+        room = self.get_room(reservation.room_id)
+        if not room:
+            return False
+
+        check_in = reservation.check_in_day
+        check_out = today_day()
+        if check_in is None or check_out < check_in:
+            return False
+
+        days = check_out - check_in
+        if days <= 0:
+            days = 1
+
+        final_cost = days * room.price
+        room.current_guest_id = None
+        self._set_reservation_status(reservation, "تسویه شده")
+        reservation.total_cost = final_cost
+        reservation.check_out_date = format_day(check_out)
+        if self._income is not None:
+            self._record_income(check_out, room.room_id, final_cost)
+        self._release_room(room, reservation.guest_id)
+        self._persist(rooms=[room], reservations=[reservation])
+        return final_cost
+
+    @_room_locked(by_reservation=True)
+    @_synchronized
+    def cancel_reservation(self, reservation_id: str) -> bool:
+        reservation = self.get_reservation(reservation_id)
+        if not reservation or reservation.status != "فعال":
+            return False
+        room = self.get_room(reservation.room_id)
+        if not room:
+            return False
+
+        self._set_reservation_status(reservation, "لغو شده")
+        self._release_room(room, reservation.guest_id)
+        self._persist(rooms=[room], reservations=[reservation])
+        return True
+
+    def get_reservation(self, reservation_id: str) -> Optional[Reservation]:
+        reservation = self._reservations_by_id.get(reservation_id)
+        if reservation is None and self.archive is not None:
+            reservation = self.archive.get(reservation_id)
+        if reservation is None and not self.storage.loads_history:
+            res_data = self.storage.fetch_reservation(reservation_id)
+            if res_data is not None:
+                reservation = Reservation.from_dict(res_data)
+        return reservation
+
+    def _stored_reservations(self, rows: List[Dict]) -> List[Reservation]:
+        return [self._reservations_by_id.get(res_data["reservation_id"]) or Reservation.from_dict(res_data)
+                for res_data in rows]
+
+    def get_all_reservations(self) -> List[Reservation]:
+        self.update_room_status()
+        with self._lock.read():
+            if not self.storage.loads_history:
+                return self._stored_reservations(self.storage.fetch_reservations())
+            if self.archive is not None:
+                return list(self.archive) + self.reservations
+            return list(self.reservations)
+
+    def get_active_reservations(self) -> List[Reservation]:
+        self.update_room_status()
+        with self._lock.read():
+            return list(self._reservations_by_status.get("فعال", {}).values())
+
+    def get_guest_reservations(self, guest_id: str) -> List[Reservation]:
+        self.update_room_status()
+        with self._lock.read():
+            if not self.storage.loads_history:
+                return self._stored_reservations(self.storage.fetch_reservations(guest_id=guest_id))
+            archived = self.archive.find(guest_id=guest_id) if self.archive is not None else []
+            return archived + self._reservations_by_guest.get(guest_id, [])
+
+    def get_room_reservations(self, room_id: str) -> List[Reservation]:
+        self.refresh()
+        with self._lock.read():
+            if not self.storage.loads_history:
+                return self._stored_reservations(self.storage.fetch_reservations(room_id=room_id))
+            archived = self.archive.find(room_id=room_id) if self.archive is not None else []
+            return archived + self._reservations_by_room.get(room_id, [])
+
+    def report_room_status(self) -> Dict[str, int]:
+        self.update_room_status()
+        status_count = {"خالی": 0, "رزرو شده": 0, "اشغال شده": 0}
+        with self._lock.read():
+            for room in self.rooms:
+                if room.status in status_count:
+                    status_count[room.status] += 1
+        return status_count
+
+    def report_reservations_by_date(self, date: str) -> List[Reservation]:
+        self.update_room_status()
+        try:
+            day = parse_day(date)
+        except ValueError:
+            return []
+        with self._lock.read():
+            return self._occupancy.reservations_on(day)
+
+    def occupancy_forecast(self, start_date: Optional[str] = None, days: int = 90,
+                           room_type: Optional[str] = None) -> List[Dict]:
+        self.update_room_status()
+        try:
+            start = parse_day(start_date) if start_date else today_day()
+        except ValueError:
+            return []
+        with self._lock.read():
+            if room_type is None:
+                total_rooms = len(self.rooms)
+            else:
+                total_rooms = len(self._rooms_by_type.get(room_type, []))
+            occupancy = self._occupancy.occupied(start, days, room_type)
+        forecast = []
+        for offset, occupied in enumerate(occupancy):
+            forecast.append({
+                "date": format_day(start + offset),
+                "occupied": occupied,
+                "rooms": total_rooms,
+                "occupancy": occupied / total_rooms * 100 if total_rooms else 0.0
+            })
+        return forecast
+
+    def report_occupancy_by_room_type(self, date: str) -> Dict[str, Dict]:
+        with self._lock.read():
+            room_types = set(self._rooms_by_type) | set(self._occupancy.room_types())
+        report = {}
+        for room_type in sorted(room_types):
+            forecast = self.occupancy_forecast(date, 1, room_type)
+            if forecast and (forecast[0]["rooms"] or forecast[0]["occupied"]):
+                report[room_type] = forecast[0]
+        return report
+
+    def report_income(self, start_date: str, end_date: str) -> float:
+        self.refresh()
+        try:
+            start = parse_day(start_date)
+            end = parse_day(end_date)
+        except ValueError:
+            return 0.0
+        ledger = self._income_ledger()
+        with self._lock.read():
+            return ledger.total(start, end)
+
+    def report_income_by_room(self, start_date: str, end_date: str) -> Dict[str, float]:
+        self.refresh()
+        try:
+            start = parse_day(start_date)
+            end = parse_day(end_date)
+        except ValueError:
+            return {}
+        self._income_ledger()
+        income = {}
+        with self._lock.read():
+            for room_id, ledger in self._income_by_room.items():
+                amount = ledger.total(start, end)
+                if amount:
+                    income[room_id] = amount
+        return income
+
+    def report_income_by_room_type(self, start_date: str, end_date: str) -> Dict[str, float]:
+        income: Dict[str, float] = {}
+        for room_id, amount in self.report_income_by_room(start_date, end_date).items():
+            room = self._rooms_by_id.get(room_id)
+            room_type = room.room_type if room else "نامشخص"
+            income[room_type] = income.get(room_type, 0.0) + amount
+        return income
+
+    def analytics(self) -> ReservationAnalytics:
+        self.refresh()
+        with self._lock.read():
+            if not self.storage.loads_history:
+                columns = self.storage.reservation_columns()
+            else:
+                columns = self.archive.columns() if self.archive is not None else _history_columns()
+                reservations = self.reservations
+                room_codes = {room_id: _id_code(room_id) for room_id in self._reservations_by_room}
+                columns["room_ids"].extend([room_codes[reservation.room_id] for reservation in reservations])
+                columns["check_in_days"].extend([reservation.check_in_day or 0 for reservation in reservations])
+                columns["check_out_days"].extend([reservation.check_out_day or 0 for reservation in reservations])
+                columns["booking_days"].extend([reservation.booking_day or 0 for reservation in reservations])
+                columns["status_codes"].extend([reservation._status_code for reservation in reservations])
+                columns["total_costs"].extend([reservation.total_cost for reservation in reservations])
+            return ReservationAnalytics(columns, {room.room_id: room.room_type for room in self.rooms})
+
+    def _income_ledger(self) -> IncomeLedger:
+        income = self._income
+        if income is not None:
+            return income
+        with self._lock.write():
+            if self._income is None:
+                self._income = IncomeLedger()
+                self._income_by_room = {}
+                if self.storage.loads_history:
+                    rows = [(reservation.check_out_day, reservation.room_id, reservation.total_cost)
+                            for reservation in self._reservations_by_status.get("تسویه شده", {}).values()
+                            if reservation.check_out_day is not None]
+                    if self.archive is not None:
+                        rows.extend(self.archive.settled_income())
+                    rows.sort()
+                else:
+                    rows = self.storage.settled_income()
+                for day, room_id, amount in rows:
+                    self._record_income(day, room_id, amount)
+            return self._income
+
+    def _record_income(self, day: int, room_id: str, amount: float) -> None:
+        self._income.add(day, amount)
+        ledger = self._income_by_room.get(room_id)
+        if ledger is None:
+            ledger = self._income_by_room[room_id] = IncomeLedger()
+        ledger.add(day, amount)
+
+    def get_today_income(self) -> float:
+        today = jalali_today()
+        return self.report_income(today, today)
@@ -0,0 +1,19 @@
+import sys
+from typing import Callable, Optional
+
+MessageHandler = Callable[[str, str], None]
+
+_handler: Optional[MessageHandler] = None
+
+
+def set_message_handler(handler: Optional[MessageHandler]) -> Optional[MessageHandler]:
+    global _handler
+    previous, _handler = _handler, handler
+    return previous
+
+
+def notify(message: str, message_type: str = "info") -> None:
+    if _handler is not None:
+        _handler(message, message_type)
+    elif message_type in ("warning", "error"):
+        print(message, file=sys.stderr)
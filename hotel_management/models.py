@@ -0,0 +1,419 @@
+import bisect
+import datetime
+import re
+import sys
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+
+_JALALI_BREAKS = [-61, 9, 38, 199, 426, 686, 756, 818, 1111, 1181, 1210, 1635, 2060, 2097, 2192, 2262, 2324,
+                  2394, 2456, 3178]
+_JALALI_MONTH_OFFSETS = [0, 31, 62, 93, 124, 155, 186, 216, 246, 276, 306, 336]
+_JALALI_FIRST_YEAR = 1200
+_JALALI_LAST_YEAR = 1600
+_DATE_PATTERN = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$")
+
+
+def _jalali_new_year(year: int) -> int:
+    # روز اول فروردین به صورت شماره روز میلادی (الگوریتم jalaali)
+    if not 1 <= year < _JALALI_BREAKS[-1]:
+        raise ValueError(f"سال {year} خارج از محدوده تقویم است!")
+    gregorian_year = year + 621
+    leap_jalali = -14
+    previous_break = _JALALI_BREAKS[0]
+    jump = 0
+    for current_break in _JALALI_BREAKS[1:]:
+        jump = current_break - previous_break
+        if year < current_break:
+            break
+        leap_jalali += jump // 33 * 8 + jump % 33 // 4
+        previous_break = current_break
+    n = year - previous_break
+    leap_jalali += n // 33 * 8 + (n % 33 + 3) // 4
+    if jump % 33 == 4 and jump - n == 4:
+        leap_jalali += 1
+    leap_gregorian = gregorian_year // 4 - (gregorian_year // 100 + 1) * 3 // 4 - 150
+    march_day = 20 + leap_jalali - leap_gregorian
+    return datetime.date(gregorian_year, 3, march_day).toordinal()
+
+
+_JALALI_NEW_YEARS = [_jalali_new_year(year) for year in range(_JALALI_FIRST_YEAR, _JALALI_LAST_YEAR + 2)]
+
+
+def _jalali_year_start(year: int) -> int:
+    if _JALALI_FIRST_YEAR <= year <= _JALALI_LAST_YEAR + 1:
+        return _JALALI_NEW_YEARS[year - _JALALI_FIRST_YEAR]
+    return _jalali_new_year(year)
+
+
+def jalali_to_day(year: int, month: int, day: int) -> int:
+    if not 1 <= month <= 12:
+        raise ValueError(f"ماه {month} نامعتبر است!")
+    start = _jalali_year_start(year)
+    if month <= 6:
+        month_length = 31
+    elif month <= 11:
+        month_length = 30
+    else:
+        month_length = _jalali_year_start(year + 1) - start - 336
+    if not 1 <= day <= month_length:
+        raise ValueError(f"روز {day} در ماه {month} وجود ندارد!")
+    return start + _JALALI_MONTH_OFFSETS[month - 1] + day - 1
+
+
+def day_to_jalali(day: int) -> Tuple[int, int, int]:
+    i = bisect.bisect_right(_JALALI_NEW_YEARS, day) - 1
+    if 0 <= i < len(_JALALI_NEW_YEARS) - 1:
+        year = _JALALI_FIRST_YEAR + i
+        start = _JALALI_NEW_YEARS[i]
+    else:
+        year = datetime.date.fromordinal(day).year - 621
+        start = _jalali_new_year(year)
+        if day < start:
+            year -= 1
+            start = _jalali_new_year(year)
+    offset = day - start
+    month = bisect.bisect_right(_JALALI_MONTH_OFFSETS, offset)
+    return year, month, offset - _JALALI_MONTH_OFFSETS[month - 1] + 1
+
+
+@lru_cache(maxsize=8192)
+def parse_day(value: str) -> int:
+    match = _DATE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"تاریخ {value} نامعتبر است!")
+    year, month, day = (int(part) for part in match.groups())
+    if year >= 1700:
+        return datetime.date(year, month, day).toordinal()
+    return jalali_to_day(year, month, day)
+
+
+@lru_cache(maxsize=8192)
+def format_day(day: int) -> str:
+    year, month, day_of_month = day_to_jalali(day)
+    return f"{year:04d}-{month:02d}-{day_of_month:02d}"
+
+
+def today_day() -> int:
+    return datetime.date.today().toordinal()
+
+
+def jalali_today() -> str:
+    return format_day(today_day())
+
+
+def _date_ordinal(value: str) -> Optional[int]:
+    try:
+        return parse_day(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_STATUS_NAMES: List[str] = ["فعال", "تسویه شده", "لغو شده", "منقضی شده"]
+_STATUS_CODES: Dict[str, int] = {name: code for code, name in enumerate(_STATUS_NAMES)}
+_RESERVATION_STATUSES = tuple(_STATUS_NAMES)
+_NATIONAL_ID_PATTERN = re.compile(r"^\d{10}$")
+_PHONE_PATTERN = re.compile(r"^09\d{9}$")
+
+
+def _status_code(status: str) -> int:
+    code = _STATUS_CODES.get(status)
+    if code is None:
+        code = len(_STATUS_NAMES)
+        _STATUS_NAMES.append(sys.intern(status))
+        _STATUS_CODES[status] = code
+    return code
+
+
+def _id_code(value: str) -> int:
+    if isinstance(value, str) and value.isdigit() and str(int(value)) == value:
+        return int(value)
+    return -1
+
+
+class Room:
+    __slots__ = ("room_id", "room_type", "price", "status", "current_guest_id")
+
+    def __init__(self, room_id: str, room_type: str, price: float = 5000000, status: str = "خالی"):
+        self.room_id = room_id
+        self.room_type = room_type
+        self.price = price
+        self.status = status
+        self.current_guest_id = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "room_id": self.room_id,
+            "room_type": self.room_type,
+            "price": self.price,
+            "status": self.status,
+            "current_guest_id": self.current_guest_id
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Room':
+        room = cls(
+            room_id=data["room_id"],
+            room_type=sys.intern(data["room_type"]),
+            price=data.get("price", 5000000),
+            status=sys.intern(data["status"])
+        )
+        room.current_guest_id = data.get("current_guest_id")
+        return room
+
+    def __str__(self) -> str:
+        return f"{self.room_id:<10} {self.room_type:<15} {self.price:,.0f} تومان {self.status:<10}"
+
+
+class Guest:
+    __slots__ = ("guest_id", "name", "family", "national_id", "phone", "address")
+
+    def __init__(self, guest_id: str, name: str, family: str, national_id: str, phone: str, address: str = ""):
+        self.guest_id = guest_id
+        self.name = name
+        self.family = family
+        self.national_id = national_id
+        self.phone = phone
+        self.address = address
+
+    def to_dict(self) -> Dict:
+        return {
+            "guest_id": self.guest_id,
+            "name": self.name,
+            "family": self.family,
+            "national_id": self.national_id,
+            "phone": self.phone,
+            "address": self.address
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Guest':
+        return cls(
+            guest_id=data["guest_id"],
+            name=data["name"],
+            family=data.get("family", ""),
+            national_id=data["national_id"],
+            phone=data["phone"],
+            address=data.get("address", "")
+        )
+
+    def __str__(self) -> str:
+        return f"{self.guest_id:<10} {self.name:<15} {self.family:<15} {self.national_id:<12} {self.phone:<12}"
+
+
+class Reservation:
+    __slots__ = ("reservation_id", "guest_id", "room_id", "_check_in_date", "check_in_day",
+                 "_check_out_date", "check_out_day", "_status_code", "total_cost", "_booking_date", "booking_day")
+
+    def __init__(self, reservation_id: str, guest_id: str, room_id: str,
+                 check_in_date: str, check_out_date: str, status: str = "فعال",
+                 booking_date: Optional[str] = None):
+        self.reservation_id = reservation_id
+        self.guest_id = guest_id
+        self.room_id = room_id
+        self.check_in_date = check_in_date
+        self.check_out_date = check_out_date
+        self.status = status
+        self.total_cost = 0.0
+        self.booking_date = booking_date
+
+    @property
+    def check_in_date(self) -> str:
+        return self._check_in_date
+
+    @check_in_date.setter
+    def check_in_date(self, value: str) -> None:
+        self._check_in_date = value
+        self.check_in_day = _date_ordinal(value)
+
+    @property
+    def check_out_date(self) -> str:
+        return self._check_out_date
+
+    @check_out_date.setter
+    def check_out_date(self, value: str) -> None:
+        self._check_out_date = value
+        self.check_out_day = _date_ordinal(value)
+
+    @property
+    def booking_date(self) -> Optional[str]:
+        return self._booking_date
+
+    @booking_date.setter
+    def booking_date(self, value: Optional[str]) -> None:
+        self._booking_date = value
+        self.booking_day = _date_ordinal(value) if value is not None else None
+
+    @property
+    def status(self) -> str:
+        return _STATUS_NAMES[self._status_code]
+
+    @status.setter
+    def status(self, value: str) -> None:
+        self._status_code = _status_code(value)
+
+    @property
+    def nights(self) -> Optional[int]:
+        if self.check_in_day is None or self.check_out_day is None:
+            return None
+        return self.check_out_day - self.check_in_day
+
+    def to_dict(self) -> Dict:
+        return {
+            "reservation_id": self.reservation_id,
+            "guest_id": self.guest_id,
+            "room_id": self.room_id,
+            "check_in_date": self.check_in_date,
+            "check_out_date": self.check_out_date,
+            "status": self.status,
+            "total_cost": self.total_cost,
+            "booking_date": self.booking_date
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Reservation':
+        reservation = cls(
+            reservation_id=data["reservation_id"],
+            guest_id=sys.intern(data["guest_id"]),
+            room_id=sys.intern(data["room_id"]),
+            check_in_date=data["check_in_date"],
+            check_out_date=data["check_out_date"],
+            status=data["status"],
+            booking_date=data.get("booking_date")
+        )
+        reservation.total_cost = data.get("total_cost", 0.0)
+        return reservation
+
+    def __str__(self) -> str:
+        return (f"{self.reservation_id:<10} {self.guest_id:<10} {self.room_id:<10} "
+                f"{self.check_in_date:<12} {self.check_out_date:<12} {self.status:<10} {self.total_cost:,.0f} تومان")
+
+
+class ReservationArchive:
+    def __init__(self):
+        self.reservation_ids = array("q")
+        self.guest_ids = array("q")
+        self.room_ids = array("q")
+        self.check_in_days = array("i")
+        self.check_out_days = array("i")
+        self.status_codes = array("b")
+        self.total_costs = array("d")
+        self.booking_days = array("i")
+        self._rows_by_id = array("i")
+        self._extra_rows: Dict[str, int] = {}
+        self._overrides: Dict[int, Dict[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.reservation_ids)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self._materialize(row)
+
+    def append(self, reservation: Reservation) -> None:
+        row = len(self)
+        overrides = {}
+        reservation_code = _id_code(reservation.reservation_id)
+        if reservation_code < 0:
+            overrides["reservation_id"] = reservation.reservation_id
+            self._extra_rows[reservation.reservation_id] = row
+        else:
+            if reservation_code >= len(self._rows_by_id):
+                self._rows_by_id.extend([0] * (reservation_code + 1 - len(self._rows_by_id)))
+            self._rows_by_id[reservation_code] = row + 1
+        for field, column in (("guest_id", self.guest_ids), ("room_id", self.room_ids)):
+            value = getattr(reservation, field)
+            code = _id_code(value)
+            if code < 0:
+                overrides[field] = value
+            column.append(code)
+        for field, day, column in (("check_in_date", reservation.check_in_day, self.check_in_days),
+                                   ("check_out_date", reservation.check_out_day, self.check_out_days),
+                                   ("booking_date", reservation.booking_day, self.booking_days)):
+            value = getattr(reservation, field)
+            if value is not None and (day is None or format_day(day) != value):
+                overrides[field] = value
+            column.append(day or 0)
+        self.reservation_ids.append(reservation_code)
+        self.status_codes.append(reservation._status_code)
+        self.total_costs.append(reservation.total_cost)
+        if overrides:
+            self._overrides[row] = overrides
+
+    def _row_of(self, reservation_id: str) -> Optional[int]:
+        code = _id_code(reservation_id)
+        if code < 0:
+            return self._extra_rows.get(reservation_id)
+        if code < len(self._rows_by_id) and self._rows_by_id[code]:
+            return self._rows_by_id[code] - 1
+        return None
+
+    def _row_dict(self, row: int) -> Dict:
+        data = self._overrides.get(row, {})
+        return {
+            "reservation_id": data["reservation_id"] if "reservation_id" in data else str(self.reservation_ids[row]),
+            "guest_id": data["guest_id"] if "guest_id" in data else str(self.guest_ids[row]),
+            "room_id": data["room_id"] if "room_id" in data else str(self.room_ids[row]),
+            "check_in_date": data["check_in_date"] if "check_in_date" in data
+            else format_day(self.check_in_days[row]),
+            "check_out_date": data["check_out_date"] if "check_out_date" in data
+            else format_day(self.check_out_days[row]),
+            "status": _STATUS_NAMES[self.status_codes[row]],
+            "total_cost": self.total_costs[row],
+            "booking_date": data["booking_date"] if "booking_date" in data
+            else format_day(self.booking_days[row]) if self.booking_days[row] else None
+        }
+
+    def _materialize(self, row: int) -> Reservation:
+        return Reservation.from_dict(self._row_dict(row))
+
+    def get(self, reservation_id: str) -> Optional[Reservation]:
+        row = self._row_of(reservation_id)
+        return self._materialize(row) if row is not None else None
+
+    def iter_dicts(self):
+        for row in range(len(self)):
+            yield self._row_dict(row)
+
+    def find(self, room_id: Optional[str] = None, guest_id: Optional[str] = None) -> List[Reservation]:
+        if room_id is not None:
+            field, value, column = "room_id", room_id, self.room_ids
+        else:
+            field, value, column = "guest_id", guest_id, self.guest_ids
+        code = _id_code(value)
+        rows = [row for row, item in enumerate(column)
+                if item == code and (code >= 0 or self._overrides.get(row, {}).get(field) == value)]
+        return [self._materialize(row) for row in rows]
+
+    def settled_income(self, first_row: int = 0) -> Dict[Tuple[int, str], float]:
+        settled = _STATUS_CODES["تسویه شده"]
+        totals: Dict[Tuple[int, str], float] = {}
+        for row in range(first_row, len(self)):
+            code = self.status_codes[row]
+            day = self.check_out_days[row]
+            if code != settled or not day:
+                continue
+            overrides = self._overrides.get(row, {})
+            room_id = overrides["room_id"] if "room_id" in overrides else str(self.room_ids[row])
+            totals[(day, room_id)] = totals.get((day, room_id), 0.0) + self.total_costs[row]
+        return totals
+
+
+_HISTORY_COLUMNS = (("room_ids", "q"), ("check_in_days", "i"), ("check_out_days", "i"),
+                    ("booking_days", "i"), ("status_codes", "b"), ("total_costs", "d"))
+
+
+def _history_columns() -> Dict[str, array]:
+    return {name: array(typecode) for name, typecode in _HISTORY_COLUMNS}
+
+
+def _append_history_row(columns: Dict[str, array], room_id: str, check_in_day: Optional[int],
+                        check_out_day: Optional[int], booking_day: Optional[int], status: str,
+                        total_cost: float) -> None:
+    columns["room_ids"].append(_id_code(room_id))
+    columns["check_in_days"].append(check_in_day or 0)
+    columns["check_out_days"].append(check_out_day or 0)
+    columns["booking_days"].append(booking_day or 0)
+    columns["status_codes"].append(_status_code(status))
+    columns["total_costs"].append(total_cost)
@@ -0,0 +1,1372 @@
+import copy
+import json
+import os
+import struct
+import threading
+from array import array
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .messages import notify
+from .models import (Reservation, ReservationArchive, _append_history_row, _date_ordinal, _history_columns, _id_code,
+                     _status_code, format_day)
+
+
+def _fsync_file(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(path: str) -> None:
+    try:
+        _fsync_file(os.path.dirname(os.path.abspath(path)))
+    except OSError:
+        pass
+
+
+class ArchiveStore:
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._partitions: Dict[str, ReservationArchive] = {}
+        self._manifest: Dict[str, Dict] = {}
+        self._income: Dict[str, Dict[Tuple[int, str], float]] = {}
+        self._manifest_dirty = False
+        self._lock = threading.RLock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            if os.path.exists(self._manifest_file):
+                with open(self._manifest_file, "r", encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+                for key, meta in self._manifest.items():
+                    if "income" in meta:
+                        self._income[key] = {(day, room_id): amount for day, room_id, amount in meta.pop("income")}
+
+    @property
+    def persistent(self) -> bool:
+        return self.directory is not None
+
+    @property
+    def _manifest_file(self) -> str:
+        return os.path.join(self.directory, "manifest.json")
+
+    def _partition_file(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.jsonl")
+
+    @staticmethod
+    def partition_key(day: Optional[int]) -> str:
+        return format_day(day)[:7] if day else "unknown"
+
+    def __len__(self) -> int:
+        return sum(meta["count"] for meta in self._manifest.values())
+
+    def __iter__(self):
+        for key in sorted(self._manifest):
+            yield from self._partition(key)
+
+    def iter_dicts(self):
+        for key in sorted(self._manifest):
+            yield from self._partition(key).iter_dicts()
+
+    def _partition(self, key: str) -> ReservationArchive:
+        partition = self._partitions.get(key)
+        if partition is not None:
+            return partition
+        with self._lock:
+            partition = self._partitions.get(key)
+            if partition is not None:
+                return partition
+            partition = ReservationArchive()
+            if self.persistent and os.path.exists(self._partition_file(key)):
+                with open(self._partition_file(key), "r", encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            reservation = Reservation.from_dict(json.loads(line))
+                        except json.JSONDecodeError:
+                            continue
+                        if partition._row_of(reservation.reservation_id) is None:
+                            partition.append(reservation)
+                meta = self._partition_meta(partition)
+                income = partition.settled_income()
+                if self._manifest.get(key) != meta or self._income.get(key) != income:
+                    self._manifest[key] = meta
+                    self._income[key] = income
+                    self._manifest_dirty = True
+            self._partitions[key] = partition
+            return partition
+
+    @staticmethod
+    def _partition_meta(partition: ReservationArchive, meta: Optional[Dict] = None, first_row: int = 0) -> Dict:
+        if meta is None or first_row == 0:
+            meta, first_row = {"count": 0, "min_id": None, "max_id": None}, 0
+        added = partition.reservation_ids[first_row:]
+        codes = [code for code in added if code >= 0]
+        codes.extend(code for code in (meta["min_id"], meta["max_id"]) if code is not None)
+        updated = {"count": len(partition), "min_id": min(codes, default=None), "max_id": max(codes, default=None)}
+        if meta.get("extra_ids") or any(code < 0 for code in added):
+            updated["extra_ids"] = True
+        return updated
+
+    def append(self, reservation: Reservation) -> None:
+        self.extend([reservation])
+
+    def extend(self, reservations: Iterable[Reservation]) -> None:
+        added: Dict[str, List[Reservation]] = {}
+        first_rows: Dict[str, int] = {}
+        for reservation in reservations:
+            key = self.partition_key(reservation.check_out_day)
+            partition = self._partition(key)
+            if partition._row_of(reservation.reservation_id) is not None:
+                continue
+            first_rows.setdefault(key, len(partition))
+            partition.append(reservation)
+            added.setdefault(key, []).append(reservation)
+        for key in added:
+            partition = self._partitions[key]
+            self._manifest[key] = self._partition_meta(partition, self._manifest.get(key), first_rows[key])
+            income = self._income.setdefault(key, {})
+            for income_key, amount in partition.settled_income(first_rows[key]).items():
+                income[income_key] = income.get(income_key, 0.0) + amount
+        if not self.persistent:
+            return
+        for key, items in added.items():
+            with open(self._partition_file(key), "a", encoding="utf-8") as f:
+                for reservation in items:
+                    f.write(json.dumps(reservation.to_dict(), ensure_ascii=False, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        if added or self._manifest_dirty:
+            self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        tmp_file = self._manifest_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({key: dict(meta, income=[[day, room_id, amount] for (day, room_id), amount
+                                               in sorted(self._income.get(key, {}).items())])
+                       for key, meta in self._manifest.items()}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self._manifest_file)
+        self._manifest_dirty = False
+
+    def get(self, reservation_id: str) -> Optional[Reservation]:
+        code = _id_code(reservation_id)
+        for key, meta in self._manifest.items():
+            in_range = code >= 0 and meta["min_id"] is not None and meta["min_id"] <= code <= meta["max_id"]
+            if in_range or meta.get("extra_ids"):
+                reservation = self._partition(key).get(reservation_id)
+                if reservation is not None:
+                    return reservation
+        return None
+
+    def find(self, room_id: Optional[str] = None, guest_id: Optional[str] = None) -> List[Reservation]:
+        result = []
+        for key in sorted(self._manifest):
+            result.extend(self._partition(key).find(room_id, guest_id))
+        return result
+
+    def columns(self) -> Dict[str, array]:
+        columns = _history_columns()
+        for key in sorted(self._manifest):
+            partition = self._partition(key)
+            for name, column in columns.items():
+                column.extend(getattr(partition, name))
+        return columns
+
+    def settled_income(self) -> List[Tuple[int, str, float]]:
+        rows = []
+        with self._lock:
+            for key in sorted(self._manifest):
+                if key not in self._income:
+                    self._partition(key)
+                rows.extend((day, room_id, amount) for (day, room_id), amount in self._income[key].items())
+            if self.persistent and self._manifest_dirty:
+                self._write_manifest()
+        return rows
+
+
+def _apply_changes(tables: Dict[str, Dict[str, Dict]], counters: Dict, changes: Dict) -> None:
+    for room_data in changes.get("rooms", []):
+        tables["rooms"][room_data["room_id"]] = room_data
+    for guest_data in changes.get("guests", []):
+        tables["guests"][guest_data["guest_id"]] = guest_data
+    for res_data in changes.get("reservations", []):
+        tables["reservations"][res_data["reservation_id"]] = res_data
+    for room_id in changes.get("deleted_rooms", []):
+        tables["rooms"].pop(room_id, None)
+    for guest_id in changes.get("deleted_guests", []):
+        tables["guests"].pop(guest_id, None)
+    for key in ("next_room_id", "next_guest_id", "next_reservation_id"):
+        if key in changes:
+            counters[key] = changes[key]
+    if changes.get("imported_ids"):
+        _merge_imported_ids(counters.setdefault("imported_ids", {}), changes["imported_ids"])
+
+
+def _merge_imported_ids(target: Dict[str, Dict[str, Dict[str, str]]],
+                        imported_ids: Dict[str, Dict[str, Dict[str, str]]]) -> None:
+    for source, tables in imported_ids.items():
+        for table, item_ids in tables.items():
+            target.setdefault(source, {}).setdefault(table, {}).update(item_ids)
+
+
+_TABLE_KEYS = {"rooms": "room_id", "guests": "guest_id", "reservations": "reservation_id"}
+_COUNTER_KEYS = ("next_room_id", "next_guest_id", "next_reservation_id")
+
+
+def _iter_records(data: Dict) -> Iterable[Tuple[str, Dict]]:
+    if "records" in data:
+        yield from data["records"]
+        return
+    for table in _TABLE_KEYS:
+        for record in data.get(table, []):
+            yield table, record
+
+
+def _tables_from_data(data: Dict) -> Dict[str, Dict[str, Dict]]:
+    return {
+        "rooms": {room_data["room_id"]: room_data for room_data in data.get("rooms", [])},
+        "guests": {guest_data["guest_id"]: guest_data for guest_data in data.get("guests", [])},
+        "reservations": {res_data["reservation_id"]: res_data for res_data in data.get("reservations", [])}
+    }
+
+
+class ConcurrentUpdateError(RuntimeError):
+    pass
+
+
+class StorageBackend:
+    loads_history = True
+    shared = False
+
+    @contextmanager
+    def lock(self, exclusive: bool = True) -> Iterator[None]:
+        yield
+
+    def poll(self) -> Optional[List[Dict]]:
+        return []
+
+    def load(self) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def write(self, changes: Dict, snapshot: Callable[[], Dict]) -> None:
+        raise NotImplementedError
+
+    def write_batch(self, batch: List[Dict], snapshot: Callable[[], Dict]) -> None:
+        for changes in batch:
+            self.write(changes, snapshot)
+
+    def save(self, data: Dict) -> None:
+        raise NotImplementedError
+
+    def compact(self, snapshot: Callable[[], Dict]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def fetch_reservation(self, reservation_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def fetch_reservations(self, room_id: Optional[str] = None, guest_id: Optional[str] = None) -> List[Dict]:
+        raise NotImplementedError
+
+    def iter_reservations(self) -> Iterable[Dict]:
+        return iter(self.fetch_reservations())
+
+    def settled_income(self) -> List[Tuple[int, str, float]]:
+        raise NotImplementedError
+
+    def reservation_columns(self) -> Dict[str, array]:
+        raise NotImplementedError
+
+
+class MemoryStorage(StorageBackend):
+    def __init__(self, data: Optional[Dict] = None):
+        data = copy.deepcopy(data or {})
+        self.tables = _tables_from_data(data)
+        self.counters = {key: data[key] for key in _COUNTER_KEYS + ("imported_ids",) if key in data}
+
+    def load(self) -> Optional[Dict]:
+        data = {name: [dict(record) for record in table.values()] for name, table in self.tables.items()}
+        data.update(copy.deepcopy(self.counters))
+        return data
+
+    def write(self, changes: Dict, snapshot: Callable[[], Dict]) -> None:
+        _apply_changes(self.tables, self.counters, copy.deepcopy(changes))
+
+    def save(self, data: Dict) -> None:
+        data = copy.deepcopy(data)
+        self.tables = _tables_from_data(data)
+        self.counters = {key: data[key] for key in _COUNTER_KEYS + ("imported_ids",) if key in data}
+
+
+class _JsonRecordStream:
+    def __init__(self, f, chunk_size: int = 1 << 16):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise json.JSONDecodeError("Unexpected end of data", self._buffer, self._pos)
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self._buffer, self._pos)
+        self._pos += 1
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self._buffer) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def records(self, counters: Dict):
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if self._peek() == "[":
+                self._pos += 1
+                if self._peek() == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        yield key, self._value()
+                        if self._peek() != ",":
+                            break
+                        self._pos += 1
+                    self._expect("]")
+            else:
+                counters[key] = self._value()
+            if self._peek() != ",":
+                break
+            self._pos += 1
+        self._expect("}")
+
+
+class JsonStorage(StorageBackend):
+    def __init__(self, data_file: str = "hotel_data.json", mode: str = "snapshot", durability: str = "fsync",
+                 group_commit_ms: int = 50, snapshot_generations: int = 3, compact_threshold: int = 1000,
+                 file_format: Optional[str] = None, shared: bool = False):
+        if mode not in ["snapshot", "journal"]:
+            raise ValueError("حالت ذخیره‌سازی نامعتبر است!")
+        if shared and mode != "journal":
+            raise ValueError("دسترسی همزمان فقط در حالت ژورنال امکان‌پذیر است!")
+        if shared and fcntl is None:
+            raise ValueError("دسترسی همزمان در این سیستم‌عامل پشتیبانی نمی‌شود!")
+        if durability not in ["fsync", "group", "none"]:
+            raise ValueError("سطح پایداری نامعتبر است!")
+        if file_format is None:
+            file_format = "ndjson" if data_file.endswith((".ndjson", ".jsonl")) else "json"
+        if file_format not in ["json", "ndjson"]:
+            raise ValueError("قالب فایل داده‌ها نامعتبر است!")
+        self.data_file = data_file
+        self.file_format = file_format
+        self.mode = mode
+        self.durability = durability
+        self.group_commit_ms = group_commit_ms
+        self.snapshot_generations = snapshot_generations
+        self.compact_threshold = compact_threshold
+        self._journal = None
+        self._journal_records = 0
+        self._compaction: Optional[threading.Thread] = None
+        self._pending_sync: set = set()
+        self._sync_lock = threading.Lock()
+        self._sync_timer: Optional[threading.Timer] = None
+        self.shared = shared
+        self._lock_handle = None
+        self._lock_depth = 0
+        self._version = 0
+        self._journal_base: Optional[int] = None
+        self._journal_offset = 0
+
+    @property
+    def journal_file(self) -> str:
+        return os.path.splitext(self.data_file)[0] + ".journal"
+
+    @property
+    def _sealed_journal_file(self) -> str:
+        return self.journal_file + ".old"
+
+    @property
+    def lock_file(self) -> str:
+        return os.path.splitext(self.data_file)[0] + ".lock"
+
+    @property
+    def snapshot_files(self) -> List[str]:
+        return [self.data_file] + [f"{self.data_file}.{generation}"
+                                   for generation in range(1, self.snapshot_generations + 1)]
+
+    def load(self) -> Optional[Dict]:
+        if not self.shared:
+            return self._load()
+        with self.lock():
+            data = self._load()
+            if data is not None:
+                tables: Dict[str, List[Dict]] = {table: [] for table in _TABLE_KEYS}
+                for table, record in data.pop("records"):
+                    tables.setdefault(table, []).append(record)
+                data.update(tables)
+            self._version = data.get("version", 0) if data is not None else 0
+            if not os.path.exists(self.journal_file):
+                self._start_shared_journal()
+            with open(self.journal_file, "rb") as f:
+                self._journal_base = self._journal_base_of(f)
+                self._journal_offset = os.fstat(f.fileno()).st_size
+        return data
+
+    def _load(self) -> Optional[Dict]:
+        journals = [path for path in (self._sealed_journal_file, self.journal_file) if os.path.exists(path)]
+        if not any(os.path.exists(path) for path in self.snapshot_files) and not journals:
+            return None
+        data: Dict = {}
+        path = self._find_snapshot()
+        records = self._stream_snapshot(path, data) if path is not None else iter(())
+        if journals:
+            tables, deleted, counters, self._journal_records = self._read_journals(journals)
+            records = self._merge_journals(records, data, tables, deleted, counters)
+        else:
+            self._journal_records = 0
+        if self._journal_records and self.mode != "journal":
+            snapshot = {table: [] for table in _TABLE_KEYS}
+            for table, record in records:
+                snapshot.setdefault(table, []).append(record)
+            snapshot.update(data)
+            self._write_snapshot(snapshot)
+            self._remove_journals()
+            self._journal_records = 0
+            return snapshot
+        data["records"] = records
+        return data
+
+    def write(self, changes: Dict, snapshot: Callable[[], Dict]) -> None:
+        self.write_batch([changes], snapshot)
+
+    def write_batch(self, batch: List[Dict], snapshot: Callable[[], Dict]) -> None:
+        if self.mode != "journal":
+            self._write_snapshot(snapshot())
+            return
+        for changes in batch:
+            self._append_journal(changes)
+        self._sync_journal()
+        if self._journal_records >= self.compact_threshold:
+            self.compact(snapshot)
+
+    def save(self, data: Dict) -> None:
+        if self.shared:
+            with self.lock():
+                self._replace_shared_journal(data)
+            return
+        self._wait_for_compaction()
+        self._write_snapshot(data)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self._remove_journals()
+        self._journal_records = 0
+
+    def _write_snapshot(self, data: Dict, force_sync: bool = False) -> None:
+        sync = self.durability == "fsync" or (force_sync and self.durability != "none")
+        tmp_file = self.data_file + ".tmp"
+        with self._open_snapshot(tmp_file) as f:
+            self._dump(data, f)
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        self._rotate_snapshots()
+        os.replace(tmp_file, self.data_file)
+        if sync:
+            _fsync_dir(self.data_file)
+        elif self.durability == "group":
+            self._schedule_sync(self.data_file)
+
+    def _rotate_snapshots(self) -> None:
+        if self.snapshot_generations <= 0 or not os.path.exists(self.data_file):
+            return
+        generations = self.snapshot_files
+        for generation in range(len(generations) - 1, 1, -1):
+            if os.path.exists(generations[generation - 1]):
+                os.replace(generations[generation - 1], generations[generation])
+        os.replace(self.data_file, generations[1])
+
+    def _schedule_sync(self, path: str) -> None:
+        with self._sync_lock:
+            self._pending_sync.add(path)
+            if self._sync_timer is None:
+                self._sync_timer = threading.Timer(self.group_commit_ms / 1000, self._group_commit)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+
+    def _group_commit(self) -> None:
+        with self._sync_lock:
+            paths, self._pending_sync = self._pending_sync, set()
+            self._sync_timer = None
+        for path in paths:
+            if os.path.exists(path):
+                _fsync_file(path)
+        if paths:
+            _fsync_dir(self.data_file)
+
+    def _append_journal(self, record: Dict) -> None:
+        if self.shared:
+            if self._journal is not None and \
+                    os.fstat(self._journal.fileno()).st_ino != os.stat(self.journal_file).st_ino:
+                self._journal.close()
+                self._journal = None
+            self._version += 1
+            record = dict(record, version=self._version)
+        if self._journal is None:
+            self._journal = open(self.journal_file, "a", encoding="utf-8")
+        self._journal.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._journal.flush()
+        self._journal_records += 1
+        if self.shared:
+            self._journal_offset = os.fstat(self._journal.fileno()).st_size
+
+    def _sync_journal(self) -> None:
+        if self.durability == "fsync":
+            os.fsync(self._journal.fileno())
+        elif self.durability == "group":
+            self._schedule_sync(self.journal_file)
+
+    @contextmanager
+    def lock(self, exclusive: bool = True) -> Iterator[None]:
+        if self.shared and not self._lock_depth:
+            if self._lock_handle is None:
+                self._lock_handle = open(self.lock_file, "a")
+            fcntl.flock(self._lock_handle.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self.shared and not self._lock_depth:
+                fcntl.flock(self._lock_handle.fileno(), fcntl.LOCK_UN)
+
+    def poll(self) -> Optional[List[Dict]]:
+        if not self.shared:
+            return []
+        with self.lock(exclusive=False):
+            if not os.path.exists(self.journal_file):
+                return None
+            with open(self.journal_file, "rb") as f:
+                base = self._journal_base_of(f)
+                if base is None or base > self._version:
+                    return None
+                if base == self._journal_base:
+                    f.seek(self._journal_offset)
+                offset = f.tell()
+                tail = f.read()
+            tail = tail[:tail.rfind(b"\n") + 1]
+            records = []
+            for line in tail.splitlines():
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("version", 0) > self._version:
+                    records.append(record)
+                    self._version = record["version"]
+            self._journal_base, self._journal_offset = base, offset + len(tail)
+        return records
+
+    @staticmethod
+    def _journal_base_of(f) -> Optional[int]:
+        try:
+            return json.loads(f.readline()).get("version")
+        except (json.JSONDecodeError, AttributeError):
+            return None
+
+    def _replace_shared_journal(self, data: Dict) -> None:
+        self._write_snapshot(dict(data, version=self._version), force_sync=True)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self._start_shared_journal()
+        self._journal_records = 0
+
+    def _start_shared_journal(self) -> None:
+        tmp_file = self.journal_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": self._version}) + "\n")
+            f.flush()
+            if self.durability != "none":
+                os.fsync(f.fileno())
+        os.replace(tmp_file, self.journal_file)
+        self._journal_base = self._version
+        self._journal_offset = os.path.getsize(self.journal_file)
+
+    def compact(self, snapshot: Callable[[], Dict]) -> None:
+        if self.mode != "journal":
+            return
+        if self.shared:
+            with self.lock():
+                self._replace_shared_journal(snapshot())
+            return
+        self._wait_for_compaction()
+        data = snapshot()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        sealed = self._sealed_journal_file
+        if os.path.exists(self.journal_file):
+            if os.path.exists(sealed):
+                with open(self.journal_file, "r", encoding="utf-8") as src, \
+                        open(sealed, "a", encoding="utf-8") as dst:
+                    dst.write(src.read())
+                os.remove(self.journal_file)
+            else:
+                os.replace(self.journal_file, sealed)
+        self._journal_records = 0
+        self._compaction = threading.Thread(target=self._finish_compaction, args=(data,))
+        self._compaction.start()
+
+    def _finish_compaction(self, data: Dict) -> None:
+        self._write_snapshot(data, force_sync=True)
+        if os.path.exists(self._sealed_journal_file):
+            os.remove(self._sealed_journal_file)
+
+    def _wait_for_compaction(self) -> None:
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+    def close(self) -> None:
+        self._wait_for_compaction()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        with self._sync_lock:
+            timer = self._sync_timer
+        if timer is not None:
+            timer.cancel()
+        self._group_commit()
+        if self._lock_handle is not None:
+            self._lock_handle.close()
+            self._lock_handle = None
+
+    def _open_snapshot(self, path: str):
+        return open(path, "w", encoding="utf-8")
+
+    def _dump(self, data: Dict, f) -> None:
+        if self.file_format == "json":
+            json.dump(data, f, ensure_ascii=False, indent=4)
+            return
+        for table, record in _iter_records(data):
+            f.write(json.dumps([table, record], ensure_ascii=False, separators=(",", ":")) + "\n")
+        counters = {key: value for key, value in data.items() if key not in _TABLE_KEYS}
+        f.write(json.dumps(counters, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def _snapshot_complete(self, path: str) -> bool:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - 4096, 0))
+            tail = f.read().decode("utf-8", errors="ignore").rstrip()
+        if self.file_format == "json":
+            return tail.endswith("}")
+        try:
+            return isinstance(json.loads(tail.rsplit("\n", 1)[-1]), dict)
+        except json.JSONDecodeError:
+            return False
+
+    def _find_snapshot(self) -> Optional[str]:
+        damaged = False
+        for path in self.snapshot_files:
+            if not os.path.exists(path):
+                continue
+            if not self._snapshot_complete(path):
+                notify(f"فایل {path} آسیب دیده است، نسخه قبلی بررسی می‌شود.", "warning")
+                damaged = True
+                continue
+            if damaged:
+                notify(f"داده‌ها از نسخه پشتیبان {path} بازیابی شد.", "warning")
+            return path
+        if damaged:
+            raise json.JSONDecodeError("No intact snapshot", "", 0)
+        return None
+
+    def _stream_snapshot(self, path: str, counters: Dict) -> Iterable[Tuple[str, Dict]]:
+        with open(path, "r", encoding="utf-8") as f:
+            if self.file_format == "json":
+                yield from _JsonRecordStream(f).records(counters)
+                return
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if isinstance(item, dict):
+                    counters.update(item)
+                else:
+                    yield item[0], item[1]
+
+    def _remove_journals(self) -> None:
+        for path in (self._sealed_journal_file, self.journal_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _read_journals(paths: List[str]) -> Tuple[Dict[str, Dict[str, Dict]], Dict[str, set], Dict, int]:
+        tables: Dict[str, Dict[str, Dict]] = {table: {} for table in _TABLE_KEYS}
+        deleted: Dict[str, set] = {table: set() for table in _TABLE_KEYS}
+        counters: Dict = {}
+        replayed = 0
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        notify(f"رکورد ناقص در فایل {path} نادیده گرفته شد.", "warning")
+                        continue
+                    JsonStorage._merge_record(tables, deleted, counters, record)
+                    replayed += 1
+        return tables, deleted, counters, replayed
+
+    @staticmethod
+    def _merge_record(tables: Dict[str, Dict[str, Dict]], deleted: Dict[str, set], counters: Dict,
+                      record: Dict) -> None:
+        for table, key in _TABLE_KEYS.items():
+            for item in record.get(table, []):
+                tables[table][item[key]] = item
+                deleted[table].discard(item[key])
+        for table, field in (("rooms", "deleted_rooms"), ("guests", "deleted_guests")):
+            for item_id in record.get(field, []):
+                tables[table].pop(item_id, None)
+                deleted[table].add(item_id)
+        counters.update({key: record[key] for key in _COUNTER_KEYS + ("version",) if key in record})
+        if record.get("imported_ids"):
+            _merge_imported_ids(counters.setdefault("imported_ids", {}), record["imported_ids"])
+
+    @staticmethod
+    def _merge_journals(records: Iterable[Tuple[str, Dict]], data: Dict, tables: Dict[str, Dict[str, Dict]],
+                        deleted: Dict[str, set], counters: Dict) -> Iterable[Tuple[str, Dict]]:
+        for table, record in records:
+            key = record[_TABLE_KEYS[table]] if table in _TABLE_KEYS else None
+            if key in deleted.get(table, ()):
+                continue
+            yield table, tables.get(table, {}).pop(key, record)
+        for table, items in tables.items():
+            for record in items.values():
+                yield table, record
+        imported_ids = counters.pop("imported_ids", None)
+        data.update(counters)
+        if imported_ids:
+            _merge_imported_ids(data.setdefault("imported_ids", {}), imported_ids)
+
+
+_BINARY_MAGIC = b"HOTELBIN"
+_BINARY_VERSION = 2
+_BINARY_SECTIONS = ("rooms", "guests", "reservations", "strings", "by_id", "by_room", "by_guest", "active", "income",
+                    "imported_ids")
+_BINARY_HEADER = struct.Struct("<8sIq3q" + "q" * 2 * len(_BINARY_SECTIONS))
+_BINARY_HEADERS = {1: struct.Struct("<8sIq3q" + "q" * 2 * (len(_BINARY_SECTIONS) - 1)), 2: _BINARY_HEADER}
+_BINARY_PREFIX = struct.Struct("<8sI")
+_NO_STRING = 0xFFFFFFFF
+_ROOM_FIELDS = ("room_id", "room_type", "status", "current_guest_id")
+_GUEST_FIELDS = ("guest_id", "name", "family", "national_id", "phone", "address")
+_RESERVATION_FIELDS = ("reservation_id", "guest_id", "room_id", "check_in_date", "check_out_date", "status",
+                       "booking_date")
+_ROOM_RECORD = struct.Struct("<8Id")
+_GUEST_RECORD = struct.Struct("<12I")
+_RESERVATION_RECORD = struct.Struct("<14I2id")
+_INCOME_RECORD = struct.Struct("<i2Id")
+_ROW = struct.Struct("<i")
+
+
+class BinaryStorage(JsonStorage):
+    """Memory-mapped snapshot. Rooms, guests and active reservations are decoded when the file is loaded,
+    so a cold start is O(rooms + guests + active reservations); only reservation history, income and
+    analytics columns are read from the mapped file on demand."""
+    loads_history = False
+
+    def __init__(self, data_file: str = "hotel_data.bin", durability: str = "fsync", group_commit_ms: int = 50,
+                 snapshot_generations: int = 3, compact_threshold: int = 1000):
+        super().__init__(data_file, "journal", durability, group_commit_ms, snapshot_generations, compact_threshold)
+        self._map = None
+        self._map_file = None
+        self._sections: Dict[str, Tuple[int, int]] = {name: (0, 0) for name in _BINARY_SECTIONS}
+        self._counters: Dict = {}
+        self._overlay: Dict[str, Dict[str, Dict]] = {table: {} for table in _TABLE_KEYS}
+        self._deleted: Dict[str, set] = {table: set() for table in _TABLE_KEYS}
+        self._access_lock = threading.RLock()
+
+    @property
+    def journal_file(self) -> str:
+        return self.data_file + ".journal"
+
+    def load(self) -> Optional[Dict]:
+        with self._access_lock:
+            return self._load()
+
+    def _load(self) -> Optional[Dict]:
+        journals = [path for path in (self._sealed_journal_file, self.journal_file) if os.path.exists(path)]
+        path = self._find_snapshot()
+        if path is None and not journals:
+            return None
+        if path is not None:
+            self._open_map(path)
+        self._overlay, self._deleted, counters, self._journal_records = self._read_journals(journals)
+        imported_ids = counters.pop("imported_ids", None)
+        self._counters.update(counters)
+        if imported_ids:
+            _merge_imported_ids(self._counters.setdefault("imported_ids", {}), imported_ids)
+        reservations = [self._overlay["reservations"].get(record["reservation_id"], record)
+                        for record in map(self._reservation, self._rows("active"))]
+        loaded = {record["reservation_id"] for record in reservations}
+        reservations = [record for record in reservations if record["status"] == "فعال"]
+        reservations.extend(record for reservation_id, record in self._overlay["reservations"].items()
+                            if record["status"] == "فعال" and reservation_id not in loaded)
+        data = {"rooms": list(self._iter_table("rooms")), "guests": list(self._iter_table("guests")),
+                "reservations": reservations}
+        data.update(copy.deepcopy(self._counters))
+        return data
+
+    def write_batch(self, batch: List[Dict], snapshot: Callable[[], Dict]) -> None:
+        with self._access_lock:
+            for changes in batch:
+                changes = copy.deepcopy(changes)
+                self._append_journal(changes)
+                self._merge_record(self._overlay, self._deleted, self._counters, changes)
+            self._sync_journal()
+            if self._journal_records >= self.compact_threshold:
+                self.compact(snapshot)
+
+    def save(self, data: Dict) -> None:
+        with self._access_lock:
+            changes = copy.deepcopy(data)
+            for table, field in (("rooms", "deleted_rooms"), ("guests", "deleted_guests")):
+                key = _TABLE_KEYS[table]
+                kept = {item[key] for item in data.get(table, [])}
+                changes[field] = [item[key] for item in self._iter_table(table) if item[key] not in kept]
+            self._merge_record(self._overlay, self._deleted, self._counters, changes)
+            self.compact(None)
+
+    def compact(self, snapshot: Optional[Callable[[], Dict]]) -> None:
+        with self._access_lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        data = {table: list(self._iter_table(table)) for table in _TABLE_KEYS}
+        data.update(copy.deepcopy(self._counters))
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self._write_snapshot(data, force_sync=True)
+        self._remove_journals()
+        self._journal_records = 0
+        self._open_map(self.data_file)
+        self._overlay = {table: {} for table in _TABLE_KEYS}
+        self._deleted = {table: set() for table in _TABLE_KEYS}
+
+    def close(self) -> None:
+        with self._access_lock:
+            super().close()
+            self._close_map()
+
+    def _open_snapshot(self, path: str):
+        return open(path, "wb")
+
+    def _dump(self, data: Dict, f) -> None:
+        strings = bytearray()
+        refs: Dict[str, Tuple[int, int]] = {}
+
+        def pack_refs(record: Dict, fields: Tuple[str, ...]) -> List[int]:
+            packed = []
+            for field in fields:
+                value = record.get(field)
+                if value is None:
+                    packed.extend((_NO_STRING, 0))
+                    continue
+                ref = refs.get(value)
+                if ref is None:
+                    encoded = str(value).encode("utf-8")
+                    ref = refs[value] = (len(strings), len(encoded))
+                    strings.extend(encoded)
+                packed.extend(ref)
+            return packed
+
+        rooms = data.get("rooms", [])
+        guests = data.get("guests", [])
+        reservations = data.get("reservations", [])
+        income: Dict[Tuple[int, str], float] = {}
+        for record in reservations:
+            day = _date_ordinal(record["check_out_date"])
+            if record["status"] == "تسویه شده" and day is not None:
+                income[(day, record["room_id"])] = income.get((day, record["room_id"]), 0.0) + record["total_cost"]
+        rows = range(len(reservations))
+        sections = [
+            b"".join(_ROOM_RECORD.pack(*pack_refs(room, _ROOM_FIELDS), float(room["price"])) for room in rooms),
+            b"".join(_GUEST_RECORD.pack(*pack_refs(guest, _GUEST_FIELDS)) for guest in guests),
+            b"".join(_RESERVATION_RECORD.pack(*pack_refs(record, _RESERVATION_FIELDS),
+                                              _date_ordinal(record["check_in_date"]) or 0,
+                                              _date_ordinal(record["check_out_date"]) or 0,
+                                              float(record.get("total_cost", 0.0)))
+                     for record in reservations),
+            None,
+            sorted(rows, key=lambda row: reservations[row]["reservation_id"]),
+            sorted(rows, key=lambda row: (reservations[row]["room_id"], row)),
+            sorted(rows, key=lambda row: (reservations[row]["guest_id"], row)),
+            [row for row in rows if reservations[row]["status"] == "فعال"],
+            b"".join(_INCOME_RECORD.pack(day, *pack_refs({"room_id": room_id}, ("room_id",)), amount)
+                     for (day, room_id), amount in sorted(income.items())),
+            json.dumps(data.get("imported_ids", {}), ensure_ascii=False).encode("utf-8")
+        ]
+        sections[3] = bytes(strings)
+        counts = [len(rooms), len(guests), len(reservations), len(strings)] + \
+                 [len(section) for section in sections[4:8]] + [len(income), len(sections[9])]
+        for index in range(4, 8):
+            sections[index] = struct.pack(f"<{len(sections[index])}i", *sections[index])
+
+        layout = []
+        offset = _BINARY_HEADER.size
+        for section, count in zip(sections, counts):
+            offset += -offset % 8
+            layout.extend((offset, count))
+            offset += len(section)
+        counters = [data.get(key, 1) for key in _COUNTER_KEYS]
+        f.write(_BINARY_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, offset, *counters, *layout))
+        position = _BINARY_HEADER.size
+        for section, section_offset in zip(sections, layout[::2]):
+            f.write(b"\0" * (section_offset - position))
+            f.write(section)
+            position = section_offset + len(section)
+
+    @staticmethod
+    def _header(buffer) -> Optional[Tuple]:
+        if len(buffer) < _BINARY_PREFIX.size:
+            return None
+        magic, version = _BINARY_PREFIX.unpack_from(buffer, 0)
+        header = _BINARY_HEADERS.get(version)
+        if magic != _BINARY_MAGIC or header is None or len(buffer) < header.size:
+            return None
+        return header.unpack_from(buffer, 0)
+
+    def _snapshot_complete(self, path: str) -> bool:
+        with open(path, "rb") as f:
+            header = self._header(f.read(_BINARY_HEADER.size))
+        return header is not None and header[2] == os.path.getsize(path)
+
+    def _open_map(self, path: str) -> None:
+        self._close_map()
+        self._map_file = open(path, "rb")
+        import mmap
+        self._map = mmap.mmap(self._map_file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self._header(self._map)
+        self._counters = dict(zip(_COUNTER_KEYS, header[3:6]))
+        self._sections = {name: (header[6 + 2 * index], header[7 + 2 * index]) if 7 + 2 * index < len(header)
+                          else (0, 0) for index, name in enumerate(_BINARY_SECTIONS)}
+        offset, size = self._sections["imported_ids"]
+        if size:
+            self._counters["imported_ids"] = json.loads(self._map[offset:offset + size].decode("utf-8"))
+
+    def _close_map(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map_file.close()
+            self._map = None
+            self._map_file = None
+        self._sections = {name: (0, 0) for name in _BINARY_SECTIONS}
+
+    def _string(self, offset: int, length: int) -> Optional[str]:
+        if offset == _NO_STRING:
+            return None
+        start = self._sections["strings"][0] + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    @staticmethod
+    def _number(value: float) -> Union[int, float]:
+        return int(value) if value.is_integer() else value
+
+    def _strings(self, values: Tuple[int, ...], fields: Tuple[str, ...]) -> Dict:
+        return {field: self._string(values[2 * index], values[2 * index + 1]) for index, field in enumerate(fields)}
+
+    def _room(self, row: int) -> Dict:
+        values = _ROOM_RECORD.unpack_from(self._map, self._sections["rooms"][0] + row * _ROOM_RECORD.size)
+        room = self._strings(values, _ROOM_FIELDS)
+        room["price"] = self._number(values[-1])
+        return room
+
+    def _guest(self, row: int) -> Dict:
+        values = _GUEST_RECORD.unpack_from(self._map, self._sections["guests"][0] + row * _GUEST_RECORD.size)
+        return self._strings(values, _GUEST_FIELDS)
+
+    def _reservation_values(self, row: int) -> Tuple:
+        return _RESERVATION_RECORD.unpack_from(
+            self._map, self._sections["reservations"][0] + row * _RESERVATION_RECORD.size)
+
+    def _reservation(self, row: int) -> Dict:
+        values = self._reservation_values(row)
+        reservation = self._strings(values, _RESERVATION_FIELDS)
+        reservation["total_cost"] = self._number(values[-1])
+        return reservation
+
+    def _reservation_field(self, row: int, field: str) -> str:
+        index = _RESERVATION_FIELDS.index(field)
+        values = self._reservation_values(row)
+        return self._string(values[2 * index], values[2 * index + 1])
+
+    def _rows(self, index: str, start: int = 0, stop: Optional[int] = None) -> List[int]:
+        offset, count = self._sections[index]
+        stop = count if stop is None else stop
+        return [_ROW.unpack_from(self._map, offset + position * _ROW.size)[0] for position in range(start, stop)]
+
+    def _lower_bound(self, index: str, field: str, value: str) -> int:
+        low, high = 0, self._sections[index][1]
+        while low < high:
+            middle = (low + high) // 2
+            if self._reservation_field(self._rows(index, middle, middle + 1)[0], field) < value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find_row(self, reservation_id: str) -> Optional[int]:
+        position = self._lower_bound("by_id", "reservation_id", reservation_id)
+        if position < self._sections["by_id"][1]:
+            row = self._rows("by_id", position, position + 1)[0]
+            if self._reservation_field(row, "reservation_id") == reservation_id:
+                return row
+        return None
+
+    def _rows_with(self, index: str, field: str, value: str) -> List[int]:
+        position = self._lower_bound(index, field, value)
+        rows = []
+        while position < self._sections[index][1]:
+            row = self._rows(index, position, position + 1)[0]
+            if self._reservation_field(row, field) != value:
+                break
+            rows.append(row)
+            position += 1
+        return rows
+
+    def _iter_table(self, table: str) -> Iterable[Dict]:
+        decode = {"rooms": self._room, "guests": self._guest, "reservations": self._reservation}[table]
+        key = _TABLE_KEYS[table]
+        overlay = self._overlay[table]
+        deleted = self._deleted[table]
+        seen = set()
+        for row in range(self._sections[table][1]):
+            record = decode(row)
+            if record[key] in deleted:
+                continue
+            seen.add(record[key])
+            yield overlay.get(record[key], record)
+        for item_id, record in overlay.items():
+            if item_id not in seen:
+                yield record
+
+    def fetch_reservation(self, reservation_id: str) -> Optional[Dict]:
+        with self._access_lock:
+            if reservation_id in self._overlay["reservations"]:
+                return self._overlay["reservations"][reservation_id]
+            row = self._find_row(reservation_id)
+            return self._reservation(row) if row is not None else None
+
+    def fetch_reservations(self, room_id: Optional[str] = None, guest_id: Optional[str] = None) -> List[Dict]:
+        with self._access_lock:
+            return self._fetch_reservations(room_id, guest_id)
+
+    def _fetch_reservations(self, room_id: Optional[str], guest_id: Optional[str]) -> List[Dict]:
+        if room_id is None and guest_id is None:
+            return list(self._iter_table("reservations"))
+        field, value, index = ("room_id", room_id, "by_room") if room_id is not None else \
+            ("guest_id", guest_id, "by_guest")
+        overlay = self._overlay["reservations"]
+        records = [self._reservation(row) for row in self._rows_with(index, field, value)]
+        stored = {record["reservation_id"] for record in records}
+        records = [overlay.get(record["reservation_id"], record) for record in records]
+        records.extend(record for reservation_id, record in overlay.items()
+                       if record[field] == value and reservation_id not in stored)
+        return records
+
+    def iter_reservations(self) -> Iterable[Dict]:
+        with self._access_lock:
+            yield from self._iter_table("reservations")
+
+    def settled_income(self) -> List[Tuple[int, str, float]]:
+        with self._access_lock:
+            return self._settled_income()
+
+    def _settled_income(self) -> List[Tuple[int, str, float]]:
+        offset, count = self._sections["income"]
+        rows = []
+        for position in range(count):
+            day, room_offset, room_length, amount = _INCOME_RECORD.unpack_from(
+                self._map, offset + position * _INCOME_RECORD.size)
+            rows.append((day, self._string(room_offset, room_length), amount))
+        for reservation_id, record in self._overlay["reservations"].items():
+            day = _date_ordinal(record["check_out_date"])
+            if record["status"] != "تسویه شده" or day is None:
+                continue
+            row = self._find_row(reservation_id)
+            if row is None or self._reservation_field(row, "status") != "تسویه شده":
+                rows.append((day, record["room_id"], record["total_cost"]))
+        rows.sort()
+        return rows
+
+    def reservation_columns(self) -> Dict[str, array]:
+        with self._access_lock:
+            return self._reservation_columns()
+
+    def _reservation_columns(self) -> Dict[str, array]:
+        columns = _history_columns()
+        overlay = self._overlay["reservations"]
+        skipped = {self._find_row(reservation_id) for reservation_id in overlay}
+        offset, count = self._sections["reservations"]
+        room_codes: Dict[Tuple[int, int], int] = {}
+        status_names: Dict[Tuple[int, int], str] = {}
+        if count:
+            records = struct.iter_unpack(_RESERVATION_RECORD.format,
+                                         self._map[offset:offset + count * _RESERVATION_RECORD.size])
+            for row, values in enumerate(records):
+                if row in skipped:
+                    continue
+                room_ref = values[4:6]
+                if room_ref not in room_codes:
+                    room_codes[room_ref] = _id_code(self._string(*room_ref))
+                status_ref = values[10:12]
+                if status_ref not in status_names:
+                    status_names[status_ref] = self._string(*status_ref)
+                booking = self._string(*values[12:14])
+                columns["room_ids"].append(room_codes[room_ref])
+                columns["check_in_days"].append(values[14])
+                columns["check_out_days"].append(values[15])
+                columns["booking_days"].append(_date_ordinal(booking) or 0 if booking is not None else 0)
+                columns["status_codes"].append(_status_code(status_names[status_ref]))
+                columns["total_costs"].append(values[16])
+        for record in overlay.values():
+            _append_history_row(columns, record["room_id"], _date_ordinal(record["check_in_date"]),
+                                _date_ordinal(record["check_out_date"]), _date_ordinal(record.get("booking_date")),
+                                record["status"], record["total_cost"])
+        return columns
+
+
+class SQLiteStorage(StorageBackend):
+    loads_history = False
+
+    def __init__(self, db_file: str = "hotel_data.db", durability: str = "fsync"):
+        if durability not in ["fsync", "group", "none"]:
+            raise ValueError("سطح پایداری نامعتبر است!")
+        self.db_file = db_file
+        import sqlite3
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._access_lock = threading.RLock()
+        try:
+            self._create_schema(durability)
+        except sqlite3.DatabaseError as e:
+            self.conn.close()
+            raise ValueError(f"فایل {db_file} پایگاه داده SQLite معتبر نیست: {e}") from e
+
+    def _create_schema(self, durability: str) -> None:
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        synchronous = {"fsync": "FULL", "group": "NORMAL", "none": "OFF"}[durability]
+        self.conn.execute(f"PRAGMA synchronous={synchronous}")
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS rooms (
+                    room_id TEXT PRIMARY KEY,
+                    room_type TEXT NOT NULL,
+                    price REAL NOT NULL,
+                    status TEXT NOT NULL,
+                    current_guest_id TEXT
+                );
+                CREATE TABLE IF NOT EXISTS guests (
+                    guest_id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    family TEXT NOT NULL,
+                    national_id TEXT NOT NULL,
+                    phone TEXT NOT NULL,
+                    address TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS reservations (
+                    reservation_id TEXT PRIMARY KEY,
+                    guest_id TEXT NOT NULL,
+                    room_id TEXT NOT NULL,
+                    check_in_date TEXT NOT NULL,
+                    check_out_date TEXT NOT NULL,
+                    check_in_day INTEGER,
+                    check_out_day INTEGER,
+                    status TEXT NOT NULL,
+                    total_cost REAL NOT NULL,
+                    booking_date TEXT,
+                    booking_day INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_reservations_room ON reservations (room_id);
+                CREATE INDEX IF NOT EXISTS idx_reservations_guest ON reservations (guest_id);
+                DROP INDEX IF EXISTS idx_reservations_status_in;
+                CREATE INDEX IF NOT EXISTS idx_reservations_status_out ON reservations (status, check_out_day);
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS imported_ids (
+                    source TEXT NOT NULL,
+                    table_name TEXT NOT NULL,
+                    source_id TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    PRIMARY KEY (source, table_name, source_id)
+                );
+            """)
+            columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(reservations)")}
+            if "booking_date" not in columns:
+                self.conn.execute("ALTER TABLE reservations ADD COLUMN booking_date TEXT")
+                self.conn.execute("ALTER TABLE reservations ADD COLUMN booking_day INTEGER")
+
+    def load(self) -> Optional[Dict]:
+        with self._access_lock:
+            return self._load()
+
+    def _load(self) -> Optional[Dict]:
+        data = {
+            "rooms": [dict(row) for row in self.conn.execute("SELECT * FROM rooms ORDER BY rowid")],
+            "guests": [dict(row) for row in self.conn.execute("SELECT * FROM guests ORDER BY rowid")],
+            "reservations": [self._reservation_data(row) for row in self.conn.execute(
+                "SELECT * FROM reservations WHERE status = 'فعال' ORDER BY rowid")]
+        }
+        data.update({row["name"]: row["value"] for row in self.conn.execute("SELECT * FROM counters")})
+        imported_ids: Dict[str, Dict[str, Dict[str, str]]] = {}
+        for row in self.conn.execute("SELECT * FROM imported_ids"):
+            imported_ids.setdefault(row["source"], {}).setdefault(row["table_name"], {})[row["source_id"]] = \
+                row["item_id"]
+        if imported_ids:
+            data["imported_ids"] = imported_ids
+        return data
+
+    def write(self, changes: Dict, snapshot: Callable[[], Dict]) -> None:
+        self.write_batch([changes], snapshot)
+
+    def write_batch(self, batch: List[Dict], snapshot: Callable[[], Dict]) -> None:
+        with self._access_lock, self.conn:
+            for changes in batch:
+                self._apply(changes)
+
+    def save(self, data: Dict) -> None:
+        with self._access_lock, self.conn:
+            self.conn.execute("DELETE FROM rooms")
+            self.conn.execute("DELETE FROM guests")
+            self._apply(data)
+
+    def close(self) -> None:
+        with self._access_lock:
+            self.conn.close()
+
+    def _apply(self, changes: Dict) -> None:
+        self.conn.executemany(
+            "INSERT INTO rooms VALUES (:room_id, :room_type, :price, :status, :current_guest_id) "
+            "ON CONFLICT (room_id) DO UPDATE SET room_type = excluded.room_type, price = excluded.price, "
+            "status = excluded.status, current_guest_id = excluded.current_guest_id",
+            changes.get("rooms", []))
+        self.conn.executemany(
+            "INSERT INTO guests VALUES (:guest_id, :name, :family, :national_id, :phone, :address) "
+            "ON CONFLICT (guest_id) DO UPDATE SET name = excluded.name, family = excluded.family, "
+            "national_id = excluded.national_id, phone = excluded.phone, address = excluded.address",
+            changes.get("guests", []))
+        self.conn.executemany(
+            "INSERT INTO reservations (reservation_id, guest_id, room_id, check_in_date, check_out_date, "
+            "check_in_day, check_out_day, status, total_cost, booking_date, booking_day) "
+            "VALUES (:reservation_id, :guest_id, :room_id, :check_in_date, :check_out_date, :check_in_day, "
+            ":check_out_day, :status, :total_cost, :booking_date, :booking_day) "
+            "ON CONFLICT (reservation_id) DO UPDATE SET check_in_date = excluded.check_in_date, "
+            "check_out_date = excluded.check_out_date, check_in_day = excluded.check_in_day, "
+            "check_out_day = excluded.check_out_day, status = excluded.status, total_cost = excluded.total_cost",
+            [dict(res_data, check_in_day=_date_ordinal(res_data["check_in_date"]),
+                  check_out_day=_date_ordinal(res_data["check_out_date"]),
+                  booking_date=res_data.get("booking_date"),
+                  booking_day=_date_ordinal(res_data.get("booking_date")))
+             for res_data in changes.get("reservations", [])])
+        self.conn.executemany("DELETE FROM rooms WHERE room_id = ?",
+                              [(room_id,) for room_id in changes.get("deleted_rooms", [])])
+        self.conn.executemany("DELETE FROM guests WHERE guest_id = ?",
+                              [(guest_id,) for guest_id in changes.get("deleted_guests", [])])
+        self.conn.executemany(
+            "INSERT INTO counters VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+            [(key, changes[key]) for key in ("next_room_id", "next_guest_id", "next_reservation_id")
+             if key in changes])
+        self.conn.executemany(
+            "INSERT INTO imported_ids VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (source, table_name, source_id) DO UPDATE SET item_id = excluded.item_id",
+            [(source, table, source_id, item_id) for source, tables in changes.get("imported_ids", {}).items()
+             for table, item_ids in tables.items() for source_id, item_id in item_ids.items()])
+
+    @staticmethod
+    def _reservation_data(row: "sqlite3.Row") -> Dict:
+        data = dict(row)
+        del data["check_in_day"], data["check_out_day"], data["booking_day"]
+        return data
+
+    def fetch_reservation(self, reservation_id: str) -> Optional[Dict]:
+        with self._access_lock:
+            row = self.conn.execute("SELECT * FROM reservations WHERE reservation_id = ?",
+                                    (reservation_id,)).fetchone()
+        return self._reservation_data(row) if row else None
+
+    def fetch_reservations(self, room_id: Optional[str] = None, guest_id: Optional[str] = None) -> List[Dict]:
+        with self._access_lock:
+            if room_id is not None:
+                rows = self.conn.execute("SELECT * FROM reservations WHERE room_id = ? ORDER BY rowid", (room_id,))
+            elif guest_id is not None:
+                rows = self.conn.execute("SELECT * FROM reservations WHERE guest_id = ? ORDER BY rowid",
+                                         (guest_id,))
+            else:
+                rows = self.conn.execute("SELECT * FROM reservations ORDER BY rowid")
+            return [self._reservation_data(row) for row in rows]
+
+    def iter_reservations(self) -> Iterable[Dict]:
+        with self._access_lock:
+            for row in self.conn.execute("SELECT * FROM reservations ORDER BY rowid"):
+                yield self._reservation_data(row)
+
+    def settled_income(self) -> List[Tuple[int, str, float]]:
+        with self._access_lock:
+            return self.conn.execute(
+                "SELECT check_out_day, room_id, SUM(total_cost) FROM reservations WHERE status = 'تسویه شده' "
+                "AND check_out_day IS NOT NULL GROUP BY check_out_day, room_id ORDER BY check_out_day").fetchall()
+
+    def reservation_columns(self) -> Dict[str, array]:
+        columns = _history_columns()
+        with self._access_lock:
+            for row in self.conn.execute("SELECT room_id, check_in_day, check_out_day, booking_day, status, "
+                                         "total_cost FROM reservations ORDER BY rowid"):
+                _append_history_row(columns, *row)
+        return columns
@@ -1,11 +1,12 @@
-import datetime
-import json
 import os
-import re
-from typing import Dict, List, Optional, Union
-from colorama import init, Fore, Back, Style
+import sys
+from typing import Dict, List
 
-init()
+from colorama import Back, Fore, Style, init
+
+from .core import HotelManagementSystem
+from .messages import set_message_handler
+from .storage import ConcurrentUpdateError
 
 
 def clear_terminal():
@@ -84,487 +85,6 @@ def print_timeline(income: float, start_date: str, end_date: str, max_width: int
     print(Fore.CYAN + "─" * 50 + Style.RESET_ALL + "\n")
 
 
-class Room:
-    def __init__(self, room_id: str, room_type: str, price: float = 5000000, status: str = "خالی"):
-        self.room_id = room_id
-        self.room_type = room_type
-        self.price = price
-        self.status = status
-        self.current_guest_id = None
-
-    def to_dict(self) -> Dict:
-        return {
-            "room_id": self.room_id,
-            "room_type": self.room_type,
-            "price": self.price,
-            "status": self.status,
-            "current_guest_id": self.current_guest_id
-        }
-
-    @classmethod
-    def from_dict(cls, data: Dict) -> 'Room':
-        room = cls(
-            room_id=data["room_id"],
-            room_type=data["room_type"],
-            price=data.get("price", 5000000),
-            status=data["status"]
-        )
-        room.current_guest_id = data.get("current_guest_id")
-        return room
-
-    def __str__(self) -> str:
-        return f"{self.room_id:<10} {self.room_type:<15} {self.price:,.0f} تومان {self.status:<10}"
-
-
-class Guest:
-    def __init__(self, guest_id: str, name: str, family: str, national_id: str, phone: str, address: str = ""):
-        self.guest_id = guest_id
-        self.name = name
-        self.family = family
-        self.national_id = national_id
-        self.phone = phone
-        self.address = address
-
-    def to_dict(self) -> Dict:
-        return {
-            "guest_id": self.guest_id,
-            "name": self.name,
-            "family": self.family,
-            "national_id": self.national_id,
-            "phone": self.phone,
-            "address": self.address
-        }
-
-    @classmethod
-    def from_dict(cls, data: Dict) -> 'Guest':
-        return cls(
-            guest_id=data["guest_id"],
-            name=data["name"],
-            family=data.get("family", ""),
-            national_id=data["national_id"],
-            phone=data["phone"],
-            address=data.get("address", "")
-        )
-
-    def __str__(self) -> str:
-        return f"{self.guest_id:<10} {self.name:<15} {self.family:<15} {self.national_id:<12} {self.phone:<12}"
-
-
-class Reservation:
-    def __init__(self, reservation_id: str, guest_id: str, room_id: str,
-                 check_in_date: str, check_out_date: str, status: str = "فعال"):
-        self.reservation_id = reservation_id
-        self.guest_id = guest_id
-        self.room_id = room_id
-        self.check_in_date = check_in_date
-        self.check_out_date = check_out_date
-        self.status = status
-        self.total_cost = 0.0
-
-    def to_dict(self) -> Dict:
-        return {
-            "reservation_id": self.reservation_id,
-            "guest_id": self.guest_id,
-            "room_id": self.room_id,
-            "check_in_date": self.check_in_date,
-            "check_out_date": self.check_out_date,
-            "status": self.status,
-            "total_cost": self.total_cost
-        }
-
-    @classmethod
-    def from_dict(cls, data: Dict) -> 'Reservation':
-        reservation = cls(
-            reservation_id=data["reservation_id"],
-            guest_id=data["guest_id"],
-            room_id=data["room_id"],
-            check_in_date=data["check_in_date"],
-            check_out_date=data["check_out_date"],
-            status=data["status"]
-        )
-        reservation.total_cost = data.get("total_cost", 0.0)
-        return reservation
-
-    def __str__(self) -> str:
-        return (f"{self.reservation_id:<10} {self.guest_id:<10} {self.room_id:<10} "
-                f"{self.check_in_date:<12} {self.check_out_date:<12} {self.status:<10} {self.total_cost:,.0f} تومان")
-
-
-class HotelManagementSystem:
-    def __init__(self):
-        self.rooms: List[Room] = []
-        self.guests: List[Guest] = []
-        self.reservations: List[Reservation] = []
-        self.next_room_id = 1
-        self.next_guest_id = 1
-        self.next_reservation_id = 1
-        self.data_file = "hotel_data.json"
-        self.load_data()
-
-    def update_room_status(self) -> None:
-        today = datetime.datetime.now().date()
-        for room in self.rooms:
-            if room.status in ["رزرو شده", "اشغال شده"]:
-                reservations = self.get_room_reservations(room.room_id)
-                expired = True
-                for res in reservations:
-                    try:
-                        check_out = datetime.datetime.strptime(res.check_out_date, "%Y-%m-%d").date()
-                        if check_out >= today and res.status == "فعال":
-                            expired = False
-                            break
-                    except ValueError:
-                        print_message(f"خطا در تاریخ رزرو {res.reservation_id}: فرمت تاریخ نامعتبر است!", "error")
-                        continue
-                if expired:
-                    room.status = "خالی"
-                    room.current_guest_id = None
-                    for res in reservations:
-                        if res.status == "فعال":
-                            res.status = "منقضی شده"
-        self.save_data()
-
-    def save_data(self) -> None:
-        data = {
-            "rooms": [room.to_dict() for room in self.rooms],
-            "guests": [guest.to_dict() for guest in self.guests],
-            "reservations": [reservation.to_dict() for reservation in self.reservations],
-            "next_room_id": self.next_room_id,
-            "next_guest_id": self.next_guest_id,
-            "next_reservation_id": self.next_reservation_id
-        }
-        with open(self.data_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        print_message("فایل داده‌ها با موفقیت ذخیره شد.", "success")  # برای دیباگ
-
-    def load_data(self) -> None:
-        if not os.path.exists(self.data_file):
-            print_message("فایل داده‌ها یافت نشد، یک فایل جدید ایجاد می‌شود.", "info")
-            return
-        try:
-            with open(self.data_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            self.rooms = [Room.from_dict(room_data) for room_data in data.get("rooms", [])]
-            self.guests = [Guest.from_dict(guest_data) for guest_data in data.get("guests", [])]
-            self.reservations = [Reservation.from_dict(res_data) for res_data in data.get("reservations", [])]
-            self.next_room_id = data.get("next_room_id", 1)
-            self.next_guest_id = data.get("next_guest_id", 1)
-            self.next_reservation_id = data.get("next_reservation_id", 1)
-            self.update_room_status()
-        except json.JSONDecodeError:
-            print_message("فایل داده‌ها ساختار معتبر JSON ندارد!", "error")
-        except KeyError as e:
-            print_message(f"کلید {e} در فایل داده‌ها یافت نشد!", "error")
-        except Exception as e:
-            print_message(f"خطا در بارگذاری داده‌ها: {e}", "error")
-
-    def add_room(self, room_type: str, price: float) -> Room:
-        room_id = str(self.next_room_id)
-        room = Room(room_id=room_id, room_type=room_type, price=price)
-        self.rooms.append(room)
-        self.next_room_id += 1
-        self.save_data()
-        return room
-
-    def delete_room(self, room_id: str) -> bool:
-        for reservation in self.reservations:
-            if reservation.room_id == room_id and reservation.status == "فعال":
-                return False
-        for i, room in enumerate(self.rooms):
-            if room.room_id == room_id:
-                del self.rooms[i]
-                self.save_data()
-                return True
-        return False
-
-    def edit_room(self, room_id: str, room_type: Optional[str] = None,
-                  price: Optional[float] = None, status: Optional[str] = None) -> bool:
-        for room in self.rooms:
-            if room.room_id == room_id:
-                if room_type is not None:
-                    room.room_type = room_type
-                if price is not None:
-                    room.price = price
-                if status is not None:
-                    room.status = status
-                self.save_data()
-                return True
-        return False
-
-    def get_room(self, room_id: str) -> Optional[Room]:
-        for room in self.rooms:
-            if room.room_id == room_id:
-                return room
-        return None
-
-    def get_all_rooms(self) -> List[Room]:
-        self.update_room_status()
-        return self.rooms
-
-    def get_available_rooms(self) -> List[Room]:
-        self.update_room_status()
-        return [room for room in self.rooms if room.status == "خالی"]
-
-    def add_guest(self, name: str, family: str, national_id: str, phone: str, address: str = "") -> Guest:
-        if not name.strip():
-            raise ValueError("نام نمی‌تواند خالی باشد!")
-        if not family.strip():
-            raise ValueError("نام خانوادگی نمی‌تواند خالی باشد!")
-        if not re.match(r"^\d{10}$", national_id):
-            raise ValueError("کد ملی باید ۱۰ رقم باشد!")
-        if not re.match(r"^09\d{9}$", phone):
-            raise ValueError("شماره تلفن باید ۱۱ رقم و با 09 شروع شود!")
-
-        guest_id = str(self.next_guest_id)
-        guest = Guest(guest_id=guest_id, name=name.strip(), family=family.strip(),
-                      national_id=national_id, phone=phone, address=address)
-        self.guests.append(guest)
-        self.next_guest_id += 1
-        self.save_data()
-        return guest
-
-    def edit_guest(self, guest_id: str, name: Optional[str] = None, family: Optional[str] = None,
-                   national_id: Optional[str] = None, phone: Optional[str] = None,
-                   address: Optional[str] = None) -> bool:
-        for guest in self.guests:
-            if guest.guest_id == guest_id:
-                if name is not None:
-                    if not name.strip():
-                        raise ValueError("نام نمی‌تواند خالی باشد!")
-                    guest.name = name.strip()
-                if family is not None:
-                    if not family.strip():
-                        raise ValueError("نام خانوادگی نمی‌تواند خالی باشد!")
-                    guest.family = family.strip()
-                if national_id is not None:
-                    if not re.match(r"^\d{10}$", national_id):
-                        raise ValueError("کد ملی باید ۱۰ رقم باشد!")
-                    guest.national_id = national_id
-                if phone is not None:
-                    if not re.match(r"^09\d{9}$", phone):
-                        raise ValueError("شماره تلفن باید ۱۱ رقم و با 09 شروع شود!")
-                    guest.phone = phone
-                if address is not None:
-                    guest.address = address
-                self.save_data()
-                return True
-        return False
-
-    def delete_guest(self, guest_id: str) -> bool:
-        for reservation in self.reservations:
-            if reservation.guest_id == guest_id and reservation.status == "فعال":
-                return False
-        for i, guest in enumerate(self.guests):
-            if guest.guest_id == guest_id:
-                del self.guests[i]
-                self.save_data()
-                return True
-        return False
-
-    def get_guest(self, guest_id: str) -> Optional[Guest]:
-        for guest in self.guests:
-            if guest.guest_id == guest_id:
-                return guest
-        return None
-
-    def get_all_guests(self) -> List[Guest]:
-        return self.guests
-
-    def search_guests(self, query: str) -> List[Guest]:
-        query = query.lower()
-        return [guest for guest in self.guests
-                if query in guest.name.lower() or query in guest.national_id]
-
-    def make_reservation(self, guest_id: str, room_id: str,
-                         check_in_date: str, check_out_date: str) -> Optional[Reservation]:
-        guest = self.get_guest(guest_id)
-        room = self.get_room(room_id)
-
-        if not guest:
-            return None
-        if not room:
-            return None
-        if room.status != "خالی":
-            return None
-
-        try:
-            today = datetime.datetime.now()
-            check_in = datetime.datetime.strptime(check_in_date, "%Y-%m-%d")
-            check_out = datetime.datetime.strptime(check_out_date, "%Y-%m-%d")
-
-            if check_in.date() < today.date():
-                return None
-            if check_out <= check_in:
-                return None
-
-            days = (check_out - check_in).days
-
-            for reservation in self.get_room_reservations(room_id):
-                if reservation.status != "فعال":
-                    continue
-                res_check_in = datetime.datetime.strptime(reservation.check_in_date, "%Y-%m-%d")
-                res_check_out = datetime.datetime.strptime(reservation.check_out_date, "%Y-%m-%d")
-                if not (check_out <= res_check_in or check_in >= res_check_out):
-                    return None
-
-            reservation_id = str(self.next_reservation_id)
-            reservation = Reservation(
-                reservation_id=reservation_id,
-                guest_id=guest_id,
-                room_id=room_id,
-                check_in_date=check_in_date,
-                check_out_date=check_out_date
-            )
-
-            reservation.total_cost = days * room.price
-            room.status = "رزرو شده"
-
-            self.reservations.append(reservation)
-            self.next_reservation_id += 1
-            self.save_data()
-            return reservation
-        except ValueError:
-            return None
-
-    def check_in(self, reservation_id: str) -> bool:
-        reservation = self.get_reservation(reservation_id)
-        if not reservation or reservation.status != "فعال":
-            return False
-        room = self.get_room(reservation.room_id)
-        guest = self.get_guest(reservation.guest_id)
-        if not room or not guest:
-            return False
-
-        try:
-            check_in_date = datetime.datetime.strptime(reservation.check_in_date, "%Y-%m-%d")
-            today = datetime.datetime.now()
-            if today.date() < check_in_date.date():
-                return False
-        except ValueError:
-            return False
-
-        room.status = "اشغال شده"
-        room.current_guest_id = reservation.guest_id
-        self.save_data()
-        return True
-
-    def check_out(self, reservation_id: str) -> Union[float, bool]:
-        reservation = self.get_reservation(reservation_id)
-        if not reservation or reservation.status != "فعال":
-            return False
-        room = self.get_room(reservation.room_id)
-        if not room:
-            return False
-
-        try:
-            today = datetime.datetime.now()
-            check_in = datetime.datetime.strptime(reservation.check_in_date, "%Y-%m-%d")
-            check_out = today
-
-            if check_out.date() < check_in.date():
-                return False
-
-            days = (check_out - check_in).days
-            if days <= 0:
-                days = 1
-
-            final_cost = days * room.price
-            reservation.total_cost = final_cost
-            reservation.check_out_date = today.strftime("%Y-%m-%d")
-
-            room.status = "خالی"
-            room.current_guest_id = None
-            reservation.status = "تسویه شده"
-            self.save_data()
-            return final_cost
-        except ValueError:
-            return False
-
-    def cancel_reservation(self, reservation_id: str) -> bool:
-        reservation = self.get_reservation(reservation_id)
-        if not reservation or reservation.status != "فعال":
-            return False
-        room = self.get_room(reservation.room_id)
-        if not room:
-            return False
-
-        room.status = "خالی"
-        reservation.status = "لغو شده"
-        self.save_data()
-        return True
-
-    def get_reservation(self, reservation_id: str) -> Optional[Reservation]:
-        for reservation in self.reservations:
-            if reservation.reservation_id == reservation_id:
-                return reservation
-        return None
-
-    def get_all_reservations(self) -> List[Reservation]:
-        self.update_room_status()
-        return self.reservations
-
-    def get_active_reservations(self) -> List[Reservation]:
-        self.update_room_status()
-        return [reservation for reservation in self.reservations if reservation.status == "فعال"]
-
-    def get_guest_reservations(self, guest_id: str) -> List[Reservation]:
-        self.update_room_status()
-        return [reservation for reservation in self.reservations if reservation.guest_id == guest_id]
-
-    def get_room_reservations(self, room_id: str) -> List[Reservation]:
-        return [reservation for reservation in self.reservations if reservation.room_id == room_id]
-
-    def report_room_status(self) -> Dict[str, int]:
-        self.update_room_status()
-        status_count = {"خالی": 0, "رزرو شده": 0, "اشغال شده": 0}
-        for room in self.rooms:
-            if room.status in status_count:
-                status_count[room.status] += 1
-        return status_count
-
-    def report_reservations_by_date(self, date: str) -> List[Reservation]:
-        self.update_room_status()
-        try:
-            check_date = datetime.datetime.strptime(date, "%Y-%m-%d")
-            result = []
-
-            for reservation in self.reservations:
-                check_in = datetime.datetime.strptime(reservation.check_in_date, "%Y-%m-%d")
-                check_out = datetime.datetime.strptime(reservation.check_out_date, "%Y-%m-%d")
-
-                if check_in <= check_date < check_out and reservation.status == "فعال":
-                    result.append(reservation)
-
-            return result
-        except ValueError:
-            return []
-
-    def report_income(self, start_date: str, end_date: str) -> float:
-        try:
-            start = datetime.datetime.strptime(start_date, "%Y-%m-%d")
-            end = datetime.datetime.strptime(end_date, "%Y-%m-%d")
-
-            if end < start:
-                return 0.0
-
-            total_income = 0.0
-
-            for reservation in self.reservations:
-                if reservation.status != "تسویه شده":
-                    continue
-                check_out = datetime.datetime.strptime(reservation.check_out_date, "%Y-%m-%d")
-                if start <= check_out <= end:
-                    total_income += reservation.total_cost
-
-            return total_income
-        except ValueError:
-            return 0.0
-
-    def get_today_income(self) -> float:
-        today = datetime.datetime.now().strftime("%Y-%m-%d")
-        return self.report_income(today, today)
-
-
 def dashboard(hotel: HotelManagementSystem):
     clear_terminal()
     print_menu_title("داشبورد سیستم مدیریت هتل 🏨")
@@ -583,8 +103,14 @@ def dashboard(hotel: HotelManagementSystem):
     input(f"{Fore.YELLOW}برای بازگشت به منوی اصلی، Enter بزنید...{Style.RESET_ALL}")
 
 
-def main_menu():
-    hotel = HotelManagementSystem()
+def main_menu(shared: bool = False):
+    init()
+    set_message_handler(print_message)
+    hotel = HotelManagementSystem(shared=shared)
+    if hotel.load_error is not None:
+        print_message("برنامه برای جلوگیری از بازنویسی فایل داده‌ها متوقف شد. فایل را بررسی کنید.", "error")
+        hotel.close()
+        sys.exit(1)
 
     while True:
         clear_terminal()
@@ -600,15 +126,14 @@ def main_menu():
 
         if choice == "1":
             dashboard(hotel)
-        elif choice == "2":
-            room_menu(hotel)
-        elif choice == "3":
-            guest_menu(hotel)
-        elif choice == "4":
-            reservation_menu(hotel)
-        elif choice == "5":
-            report_menu(hotel)
+        elif choice in ["2", "3", "4", "5"]:
+            menu = {"2": room_menu, "3": guest_menu, "4": reservation_menu, "5": report_menu}[choice]
+            try:
+                menu(hotel)
+            except ConcurrentUpdateError as e:
+                print_message(str(e), "error")
         elif choice == "0":
+            hotel.close()
             print_message("خروج از برنامه...", "success")
             break
         else:
@@ -715,8 +240,7 @@ def room_menu(hotel: HotelManagementSystem):
                 print(Fore.CYAN + "─" * total_width + Style.RESET_ALL)
                 for room in occupied_rooms:
                     guest = hotel.get_guest(room.current_guest_id) if room.current_guest_id else None
-                    reservation = next((r for r in hotel.get_room_reservations(room.room_id) if r.status == "فعال"),
-                                       None)
+                    reservation = next(iter(hotel.get_room_active_reservations(room.room_id)), None)
                     print(f"اتاق {room.room_id} - نوع: {room.room_type}")
                     if guest:
                         print(
@@ -824,7 +348,7 @@ def guest_menu(hotel: HotelManagementSystem):
                     print_table(headers, rows, widths, "لیست مهمان‌ها (مرتب‌شده):")
 
         elif choice == "5":
-            query = input("\nجستجو (نام یا کد ملی): ")
+            query = input("\nجستجو (نام، نام خانوادگی، کد ملی یا تلفن): ")
             guests = hotel.search_guests(query)
 
             if not guests:
@@ -870,20 +394,27 @@ def reservation_menu(hotel: HotelManagementSystem):
             print_table(headers, rows, widths, "لیست مهمان‌ها:")
 
             guest_id = input("\nشناسه مهمان: ")
+            check_in_date = input("تاریخ ورود (مثال: 1404-01-01): ")
+            check_out_date = input("تاریخ خروج (مثال: 1404-01-05): ")
+            room_type = input("نوع اتاق [Enter برای همه]: ") or None
+            max_price_str = input("حداکثر قیمت هر شب [Enter برای بدون محدودیت]: ")
+            try:
+                max_price = float(max_price_str) if max_price_str else None
+            except ValueError:
+                print_message("خطا: قیمت باید عدد باشد!", "error")
+                continue
 
-            rooms = hotel.get_available_rooms()
+            rooms = hotel.search_available_rooms(check_in_date, check_out_date, room_type, max_price=max_price)
             if not rooms:
-                print_message("هیچ اتاق خالی وجود ندارد!")
+                print_message("هیچ اتاقی برای این بازه و شرایط در دسترس نیست!")
                 continue
 
             headers = ["شناسه", "نوع", "قیمت", "وضعیت"]
             widths = [10, 15, 15, 10]
             rows = [[room.room_id, room.room_type, f"{room.price:,.0f} تومان", room.status] for room in rooms]
-            print_table(headers, rows, widths, "لیست اتاق‌های خالی:")
+            print_table(headers, rows, widths, "اتاق‌های در دسترس برای این بازه:")
 
             room_id = input("\nشناسه اتاق: ")
-            check_in_date = input("تاریخ ورود (مثال: 1404-01-01): ")
-            check_out_date = input("تاریخ خروج (مثال: 1404-01-05): ")
 
             reservation = hotel.make_reservation(guest_id, room_id, check_in_date, check_out_date)
             if reservation:
@@ -1008,6 +539,8 @@ def report_menu(hotel: HotelManagementSystem):
         print("1. گزارش وضعیت اتاق‌ها")
         print("2. گزارش رزروهای یک تاریخ")
         print("3. گزارش درآمد")
+        print("4. پیش‌بینی اشغال ۹۰ روز آینده")
+        print("5. تحلیل ماهانه (ADR، RevPAR، نرخ اشغال)")
         print("0. بازگشت به منوی اصلی")
 
         choice = input("\nلطفا گزینه مورد نظر را انتخاب کنید: ")
@@ -1044,13 +577,39 @@ def report_menu(hotel: HotelManagementSystem):
                 print_message(f"هیچ درآمدی در بازه {start_date} تا {end_date} ثبت نشده یا تاریخ نامعتبر است!")
             else:
                 print_timeline(income, start_date, end_date)
+                by_type = hotel.report_income_by_room_type(start_date, end_date)
+                rows = [[room_type, f"{amount:,.0f} تومان"]
+                        for room_type, amount in sorted(by_type.items(), key=lambda item: -item[1])]
+                print_table(["نوع اتاق", "درآمد"], rows, [20, 20], "درآمد به تفکیک نوع اتاق:")
+
+        elif choice == "4":
+            room_type = input("\nنوع اتاق (برای همه اتاق‌ها خالی بگذارید): ").strip() or None
+            forecast = hotel.occupancy_forecast(room_type=room_type)
+            rows = [[day["date"], f"{day['occupied']} از {day['rooms']}", f"{day['occupancy']:.0f}٪"]
+                    for day in forecast if day["occupied"]]
+            if not rows:
+                print_message("هیچ اتاقی در ۹۰ روز آینده رزرو نشده است!")
+            else:
+                print_table(["تاریخ", "اتاق‌های اشغال", "درصد اشغال"], rows, [12, 15, 12],
+                            "پیش‌بینی اشغال ۹۰ روز آینده:")
+
+        elif choice == "5":
+            room_type = input("\nنوع اتاق (برای همه اتاق‌ها خالی بگذارید): ").strip() or None
+            try:
+                report = hotel.analytics().monthly_report(room_type)
+            except ImportError as e:
+                print_message(str(e), "error")
+                report = None
+            if report == []:
+                print_message("هیچ اقامتی برای تحلیل یافت نشد!")
+            elif report:
+                rows = [[month["month"], f"{month['occupancy']:.0f}٪", f"{month['adr']:,.0f}",
+                         f"{month['revpar']:,.0f}", f"{month['average_stay']:.1f}"] for month in report]
+                print_table(["ماه", "نرخ اشغال", "ADR", "RevPAR", "میانگین اقامت"], rows, [10, 10, 15, 15, 14],
+                            "تحلیل ماهانه رزروها:")
 
         elif choice == "0":
             break
 
         else:
-            print_message("گزینه نامعتبر! لطفا یک عدد از 0 تا 3 وارد کنید.", "error")
-
-
-if __name__ == "__main__":
-    main_menu()
+            print_message("گزینه نامعتبر! لطفا یک عدد از 0 تا 5 وارد کنید.", "error")
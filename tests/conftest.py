@@ -0,0 +1,10 @@
+import pytest
+
+from hotel_management import HotelManagementSystem, MemoryStorage
+
+
+@pytest.fixture
+def hotel():
+    hotel = HotelManagementSystem(storage=MemoryStorage())
+    yield hotel
+    hotel.close()
@@ -0,0 +1,20 @@
+import pytest
+
+from hotel_management import format_day, today_day
+
+pytest.importorskip("numpy")
+
+
+def test_same_day_check_out_counts_as_one_night(hotel):
+    today = today_day()
+    room = hotel.add_room("single", 100)
+    guest = hotel.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    reservation = hotel.make_reservation(guest.guest_id, room.room_id, format_day(today), format_day(today + 3))
+    assert hotel.check_in(reservation.reservation_id)
+    assert hotel.check_out(reservation.reservation_id) == 100
+
+    report = hotel.analytics().monthly_report()
+    assert sum(month["nights_sold"] for month in report) == 1
+    assert sum(month["revenue"] for month in report) == hotel.report_income(format_day(today), format_day(today))
+    assert report[0]["adr"] == 100
+    assert report[0]["average_stay"] == 1
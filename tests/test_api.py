@@ -0,0 +1,46 @@
+import asyncio
+import json
+
+from hotel_management import format_day, today_day
+from hotel_management.api import HotelApiServer
+
+
+async def request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_api_statuses(hotel):
+    async def scenario():
+        server = HotelApiServer(hotel, port=0, workers=4)
+        await server.start()
+        try:
+            status, room = await request(server.port, "POST", "/rooms", {"room_type": "single", "price": 100})
+            assert status == 201
+            status, guest = await request(server.port, "POST", "/guests", {
+                "name": "سارا", "family": "احمدی", "national_id": "1234567890", "phone": "09123456789"})
+            assert status == 201
+            booking = {"guest_id": guest["guest_id"], "room_id": room["room_id"],
+                       "check_in_date": format_day(today_day()), "check_out_date": format_day(today_day() + 2)}
+            assert (await request(server.port, "POST", "/reservations", booking))[0] == 201
+            assert (await request(server.port, "POST", "/reservations", booking))[0] == 409
+            assert (await request(server.port, "GET", "/reservations/999"))[0] == 404
+            assert (await request(server.port, "GET", "/nowhere"))[0] == 404
+            assert (await request(server.port, "DELETE", "/rooms"))[0] == 405
+            assert (await request(server.port, "GET", "/rooms/available?check_in=x&check_out=y&limit=abc"))[0] == 400
+            assert (await request(server.port, "GET", "/reports/occupancy?days=100000000"))[0] == 400
+            assert (await request(server.port, "GET", "/reports/occupancy?days=0"))[0] == 400
+            status, forecast = await request(server.port, "GET", "/reports/occupancy?days=7")
+            assert status == 200 and len(forecast) == 7
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
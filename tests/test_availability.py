@@ -0,0 +1,42 @@
+import pytest
+
+from hotel_management import format_day, today_day
+
+
+@pytest.fixture
+def booked(hotel):
+    today = today_day()
+    room = hotel.add_room("single", 100)
+    guest = hotel.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    assert hotel.make_reservation(guest.guest_id, room.room_id, format_day(today + 5), format_day(today + 8))
+    return hotel, room, guest, today
+
+
+@pytest.mark.parametrize("start, end, free", [
+    (0, 5, True),
+    (8, 10, True),
+    (4, 6, False),
+    (7, 9, False),
+    (6, 7, False),
+    (3, 10, False),
+])
+def test_overlap_check_treats_check_out_day_as_free(booked, start, end, free):
+    hotel, room, guest, today = booked
+    assert hotel.is_room_available(room.room_id, format_day(today + start), format_day(today + end)) is free
+    reservation = hotel.make_reservation(guest.guest_id, room.room_id, format_day(today + start),
+                                         format_day(today + end))
+    assert (reservation is not None) is free
+
+
+def test_booked_room_takes_other_future_dates(booked):
+    hotel, room, guest, today = booked
+    assert room.status == "رزرو شده"
+    assert hotel.search_available_rooms(format_day(today + 10), format_day(today + 12)) == [room]
+    assert hotel.search_available_rooms(format_day(today + 6), format_day(today + 7)) == []
+
+
+def test_cancel_frees_the_interval(booked):
+    hotel, room, guest, today = booked
+    reservation = hotel.get_room_active_reservations(room.room_id)[0]
+    assert hotel.cancel_reservation(reservation.reservation_id)
+    assert hotel.is_room_available(room.room_id, format_day(today + 5), format_day(today + 8))
@@ -0,0 +1,73 @@
+import datetime
+
+import pytest
+
+import hotel_management.core
+from hotel_management import day_to_jalali, format_day, jalali_to_day, parse_day, today_day
+
+
+@pytest.mark.parametrize("jalali, gregorian", [
+    ("1400-01-01", datetime.date(2021, 3, 21)),
+    ("1403-01-01", datetime.date(2024, 3, 20)),
+    ("1403-12-30", datetime.date(2025, 3, 20)),
+    ("1404-01-01", datetime.date(2025, 3, 21)),
+    ("1404-07-01", datetime.date(2025, 9, 23)),
+])
+def test_known_dates(jalali, gregorian):
+    assert parse_day(jalali) == gregorian.toordinal()
+    assert format_day(gregorian.toordinal()) == jalali
+
+
+def test_round_trip_over_several_years():
+    start = jalali_to_day(1398, 1, 1)
+    for day in range(start, jalali_to_day(1410, 1, 1)):
+        year, month, day_of_month = day_to_jalali(day)
+        assert jalali_to_day(year, month, day_of_month) == day
+        assert parse_day(format_day(day)) == day
+
+
+@pytest.mark.parametrize("year, leap", [(1399, True), (1400, False), (1403, True), (1404, False)])
+def test_esfand_length_follows_leap_years(year, leap):
+    assert jalali_to_day(year + 1, 1, 1) - jalali_to_day(year, 12, 1) == (30 if leap else 29)
+    if not leap:
+        with pytest.raises(ValueError):
+            parse_day(f"{year}-12-30")
+
+
+@pytest.mark.parametrize("check_in, check_out, nights", [
+    ("1404-06-30", "1404-07-01", 2),
+    ("1404-07-30", "1404-08-01", 1),
+    ("1403-12-29", "1404-01-01", 2),
+    ("1404-12-29", "1405-01-01", 1),
+])
+def test_nights_across_month_and_year_ends(check_in, check_out, nights):
+    assert parse_day(check_out) - parse_day(check_in) == nights
+
+
+@pytest.mark.parametrize("value", ["1404-13-01", "1404-07-31", "1404-1-1-1", "abcd-01-01"])
+def test_invalid_dates_are_rejected(value):
+    with pytest.raises(ValueError):
+        parse_day(value)
+
+
+def test_check_out_bills_the_nights_stayed(hotel, monkeypatch):
+    today = today_day()
+    room = hotel.add_room("single", 100)
+    guest = hotel.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    reservation = hotel.make_reservation(guest.guest_id, room.room_id, format_day(today), format_day(today + 5))
+    assert hotel.check_in(reservation.reservation_id)
+
+    monkeypatch.setattr(hotel_management.core, "today_day", lambda: today + 3)
+    assert hotel.check_out(reservation.reservation_id) == 300
+    assert reservation.total_cost == 300
+    assert reservation.check_out_date == format_day(today + 3)
+    assert hotel.report_income(format_day(today), format_day(today + 5)) == 300
+
+
+def test_same_day_check_out_bills_one_night(hotel):
+    today = today_day()
+    room = hotel.add_room("single", 100)
+    guest = hotel.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    reservation = hotel.make_reservation(guest.guest_id, room.room_id, format_day(today), format_day(today + 2))
+    assert hotel.check_in(reservation.reservation_id)
+    assert hotel.check_out(reservation.reservation_id) == 100
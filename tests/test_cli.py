@@ -0,0 +1,45 @@
+import json
+
+from hotel_management.cli import cli
+
+
+def run(capsys, *argv):
+    code = cli(list(argv))
+    return code, json.loads(capsys.readouterr().out)
+
+
+def test_each_storage_has_its_own_default_file(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    assert run(capsys, "rooms", "add", "single", "100")[1]["room_id"] == "1"
+    assert run(capsys, "--storage", "binary", "rooms", "add", "double", "200")[1]["room_id"] == "1"
+    assert run(capsys, "--storage", "sqlite", "rooms", "add", "suite", "300")[1]["room_id"] == "1"
+    assert [room["room_type"] for room in run(capsys, "rooms", "list")[1]] == ["single"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["hotel_data.bin.journal", "hotel_data.db",
+                                                                "hotel_data.json"]
+
+
+def test_unreadable_data_file_is_an_error(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    run(capsys, "rooms", "add", "single", "100")
+    for storage in ("sqlite", "binary"):
+        code, result = run(capsys, "--storage", storage, "--data", "hotel_data.json", "rooms", "add", "x", "10")
+        assert code == 1 and "error" in result
+    assert [room["room_type"] for room in run(capsys, "rooms", "list")[1]] == ["single"]
+
+
+def test_shared_mode_needs_json_storage(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    for storage in ("sqlite", "binary"):
+        code, result = run(capsys, "--storage", storage, "--shared", "rooms", "list")
+        assert code == 1 and "error" in result
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_room_edit_rejects_non_positive_price(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    run(capsys, "rooms", "add", "single", "100")
+    for price in ("0", "-5"):
+        code, result = run(capsys, "rooms", "edit", "1", "--price", price)
+        assert code == 1 and "error" in result
+    assert run(capsys, "rooms", "list")[1][0]["price"] == 100
+    assert run(capsys, "rooms", "edit", "1", "--price", "150")[1]["price"] == 150
@@ -0,0 +1,46 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from hotel_management import HotelManagementSystem, format_day, today_day
+
+
+def book(hotel, guest_id, room_id, start, nights=1):
+    return hotel.make_reservation(guest_id, room_id, format_day(start), format_day(start + nights))
+
+
+def test_room_locked_methods_accept_keyword_ids(hotel):
+    today = today_day()
+    room = hotel.add_room("single", 100)
+    guest = hotel.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    assert hotel.edit_room(room_id=room.room_id, price=150)
+    reservation = book(hotel, guest.guest_id, room.room_id, today)
+    assert hotel.check_in(reservation_id=reservation.reservation_id)
+    assert hotel.check_out(reservation_id=reservation.reservation_id) == 150
+    reservation = book(hotel, guest.guest_id, room.room_id, today + 1)
+    assert hotel.cancel_reservation(reservation_id=reservation.reservation_id)
+    assert hotel.delete_room(room_id=room.room_id)
+
+
+def test_same_room_is_booked_only_once(tmp_path):
+    data_file = str(tmp_path / "hotel_data.json")
+    hotel = HotelManagementSystem(data_file, "journal", durability="none")
+    today = today_day()
+    rooms = [hotel.add_room("single", 100) for _ in range(4)]
+    guests = [hotel.add_guest("سارا", "احمدی", f"{i:010d}", f"09{i:09d}") for i in range(16)]
+    barrier = threading.Barrier(len(guests))
+
+    def attempt(guest):
+        barrier.wait()
+        return [book(hotel, guest.guest_id, room.room_id, today, 3) for room in rooms]
+
+    with ThreadPoolExecutor(len(guests)) as pool:
+        results = [reservation for batch in pool.map(attempt, guests) for reservation in batch if reservation]
+
+    assert sorted(reservation.room_id for reservation in results) == [room.room_id for room in rooms]
+    assert len({reservation.reservation_id for reservation in results}) == len(rooms)
+    hotel.close()
+
+    hotel = HotelManagementSystem(data_file, "journal", durability="none")
+    assert sorted(reservation.reservation_id for reservation in hotel.get_all_reservations()) == \
+        sorted(reservation.reservation_id for reservation in results)
+    hotel.close()
@@ -0,0 +1,39 @@
+import hotel_management.core
+from hotel_management import format_day, today_day
+
+
+def test_passed_check_outs_expire_on_the_next_tick(hotel, monkeypatch):
+    today = today_day()
+    room = hotel.add_room("single", 100)
+    guest = hotel.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    short = hotel.make_reservation(guest.guest_id, room.room_id, format_day(today), format_day(today + 1))
+    later = hotel.make_reservation(guest.guest_id, room.room_id, format_day(today + 5), format_day(today + 7))
+
+    monkeypatch.setattr(hotel_management.core, "today_day", lambda: today + 2)
+    hotel.update_room_status()
+    assert short.status == "منقضی شده"
+    assert later.status == "فعال"
+    assert room.status == "رزرو شده"
+    assert [reservation.reservation_id for reservation in hotel.get_active_reservations()] == \
+        [later.reservation_id]
+
+    monkeypatch.setattr(hotel_management.core, "today_day", lambda: today + 8)
+    hotel.update_room_status()
+    assert later.status == "منقضی شده"
+    assert room.status == "خالی"
+
+
+def test_reads_without_expiry_do_not_write(hotel):
+    today = today_day()
+    room = hotel.add_room("single", 100)
+    guest = hotel.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    hotel.make_reservation(guest.guest_id, room.room_id, format_day(today), format_day(today + 2))
+    writes = []
+    write = hotel.storage.write_batch
+    hotel.storage.write_batch = lambda batch, snapshot: writes.append(batch) or write(batch, snapshot)
+
+    hotel.report_room_status()
+    hotel.get_all_rooms()
+    hotel.get_active_reservations()
+    hotel.report_reservations_by_date(format_day(today))
+    assert writes == []
@@ -0,0 +1,52 @@
+import pytest
+
+from hotel_management import normalize_search_text
+
+
+@pytest.fixture
+def guests(hotel):
+    return {
+        "sara": hotel.add_guest("سارا", "کریمی", "1234567890", "09123456789"),
+        "ali": hotel.add_guest("علی", "یزدانی", "1239999999", "09351111111"),
+        "reza": hotel.add_guest("رضا", "محمدی", "5555555555", "09127777777"),
+    }
+
+
+def names(guests):
+    return sorted(guest.name for guest in guests)
+
+
+def test_normalizes_arabic_letters_digits_and_spacing():
+    assert normalize_search_text("علي  كريمي") == "علی کریمی"
+    assert normalize_search_text("۰۹۱۲") == "0912"
+    assert normalize_search_text("٠٩١٢") == "0912"
+    assert normalize_search_text("نیک‌نام") == "نیک نام"
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("كريمي", ["سارا"]),
+    ("يزدان", ["علی"]),
+    ("محمد", ["رضا"]),
+    ("سارا کریمی", ["سارا"]),
+    ("123", ["سارا", "علی"]),
+    ("۰۹۱۲", ["رضا", "سارا"]),
+    ("0935", ["علی"]),
+    ("خسرو", []),
+])
+def test_search_covers_name_family_national_id_and_phone(hotel, guests, query, expected):
+    assert names(hotel.search_guests(query)) == expected
+
+
+def test_index_follows_edits_and_deletes(hotel, guests):
+    assert names(hotel.search_guests("سار")) == ["سارا"]
+    assert hotel.edit_guest(guests["sara"].guest_id, family="نوری", phone="09190000000")
+    assert hotel.search_guests("کریمی") == []
+    assert names(hotel.search_guests("نوری")) == ["سارا"]
+    assert names(hotel.search_guests("0919")) == ["سارا"]
+    assert hotel.delete_guest(guests["ali"].guest_id)
+    assert hotel.search_guests("یزدانی") == []
+    assert names(hotel.search_guests("123")) == ["سارا"]
+
+
+def test_limit_caps_results(hotel, guests):
+    assert len(hotel.search_guests("09", limit=2)) == 2
@@ -0,0 +1,67 @@
+import pytest
+
+from hotel_management import BinaryStorage, HotelManagementSystem, SQLiteStorage
+
+BACKENDS = {
+    "snapshot": lambda path: HotelManagementSystem(str(path / "hotel_data.json"), durability="none"),
+    "journal": lambda path: HotelManagementSystem(str(path / "hotel_data.json"), "journal", durability="none"),
+    "sqlite": lambda path: HotelManagementSystem(storage=SQLiteStorage(str(path / "hotel_data.db"), "none")),
+    "binary": lambda path: HotelManagementSystem(storage=BinaryStorage(str(path / "hotel_data.bin"), "none")),
+}
+
+
+def write_csv(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def open_hotel(request, tmp_path):
+    hotels = []
+
+    def open_hotel():
+        hotels.append(BACKENDS[request.param](tmp_path))
+        return hotels[-1]
+
+    yield open_hotel
+    for hotel in hotels:
+        hotel.close()
+
+
+def test_remapped_ids_resolve_in_a_later_run(open_hotel, tmp_path):
+    hotel = open_hotel()
+    hotel.add_room("single", 100)
+    existing = hotel.add_guest("علی", "رضایی", "1111111111", "09111111111")
+    guests = write_csv(tmp_path / "guests.csv", ["guest_id,name,family,national_id,phone",
+                                                  "1,سارا,احمدی,2222222222,09122222222"])
+    assert hotel.import_records("guests", guests, source="crm") == (1, [])
+    sara = hotel.get_guest("2")
+    assert sara.name == "سارا"
+    hotel.close()
+
+    hotel = open_hotel()
+    reservations = write_csv(tmp_path / "reservations.csv", [
+        "reservation_id,guest_id,room_id,check_in_date,check_out_date,status",
+        "1,1,1,1404-01-01,1404-01-03,تسویه شده",
+    ])
+    assert hotel.import_records("reservations", reservations, source="crm") == (1, [])
+    assert hotel.get_reservation("1").guest_id == sara.guest_id
+    assert hotel.get_reservation("1").guest_id != existing.guest_id
+
+
+def test_mapping_is_kept_per_source(open_hotel, tmp_path):
+    hotel = open_hotel()
+    hotel.add_room("single", 100)
+    hotel.add_guest("علی", "رضایی", "1111111111", "09111111111")
+    guests = write_csv(tmp_path / "guests.csv", ["guest_id,name,family,national_id,phone",
+                                                  "1,سارا,احمدی,2222222222,09122222222"])
+    hotel.import_records("guests", guests, source="crm")
+    hotel.close()
+
+    hotel = open_hotel()
+    reservations = write_csv(tmp_path / "reservations.csv", [
+        "reservation_id,guest_id,room_id,check_in_date,check_out_date,status",
+        "1,1,1,1404-01-01,1404-01-03,تسویه شده",
+    ])
+    hotel.import_records("reservations", reservations, source="pms")
+    assert hotel.get_reservation("1").guest_id == "1"
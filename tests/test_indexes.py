@@ -0,0 +1,40 @@
+from hotel_management import format_day, today_day
+
+
+def ids(reservations):
+    return sorted(reservation.reservation_id for reservation in reservations)
+
+
+def test_reservation_indexes_follow_status_changes(hotel):
+    today = today_day()
+    first, second = hotel.add_room("single", 100), hotel.add_room("double", 200)
+    sara = hotel.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    ali = hotel.add_guest("علی", "رضایی", "1111111111", "09111111111")
+    a = hotel.make_reservation(sara.guest_id, first.room_id, format_day(today), format_day(today + 2))
+    b = hotel.make_reservation(ali.guest_id, second.room_id, format_day(today), format_day(today + 2))
+    c = hotel.make_reservation(sara.guest_id, second.room_id, format_day(today + 3), format_day(today + 5))
+
+    assert ids(hotel.get_room_reservations(second.room_id)) == ids([b, c])
+    assert ids(hotel.get_guest_reservations(sara.guest_id)) == ids([a, c])
+    assert ids(hotel.get_active_reservations()) == ids([a, b, c])
+    assert ids(hotel.get_room_active_reservations(second.room_id)) == ids([b, c])
+
+    assert hotel.cancel_reservation(c.reservation_id)
+    assert hotel.check_in(a.reservation_id)
+    assert hotel.check_out(a.reservation_id)
+    assert ids(hotel.get_active_reservations()) == ids([b])
+    assert hotel.get_guest_active_reservations(sara.guest_id) == []
+    assert ids(hotel.get_guest_reservations(sara.guest_id)) == ids([a, c])
+
+
+def test_delete_is_refused_while_bookings_are_active(hotel):
+    today = today_day()
+    room = hotel.add_room("single", 100)
+    guest = hotel.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    reservation = hotel.make_reservation(guest.guest_id, room.room_id, format_day(today), format_day(today + 2))
+    assert not hotel.delete_room(room.room_id)
+    assert not hotel.delete_guest(guest.guest_id)
+
+    assert hotel.cancel_reservation(reservation.reservation_id)
+    assert hotel.delete_room(room.room_id)
+    assert hotel.delete_guest(guest.guest_id)
@@ -0,0 +1,28 @@
+import os
+
+from hotel_management import HotelManagementSystem, JsonStorage
+
+
+def room_state(hotel):
+    return sorted((room.room_id, room.room_type, room.price) for room in hotel.rooms)
+
+
+def test_journal_replays_on_top_of_compacted_snapshot(tmp_path):
+    data_file = str(tmp_path / "hotel_data.json")
+    storage = JsonStorage(data_file, "journal", "none", compact_threshold=3)
+    hotel = HotelManagementSystem(storage=storage)
+    for price in (100, 200, 300, 400):
+        hotel.add_room("single", price)
+    hotel.edit_room("1", price=150)
+    hotel.delete_room("2")
+    guest = hotel.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    expected = room_state(hotel)
+    hotel.close()
+    assert os.path.exists(data_file)
+    assert os.path.getsize(storage.journal_file) > 0
+
+    hotel = HotelManagementSystem(storage=JsonStorage(data_file, "journal", "none", compact_threshold=3))
+    assert room_state(hotel) == expected
+    assert hotel.get_guest(guest.guest_id).name == "سارا"
+    assert hotel.add_room("suite", 500).room_id == "5"
+    hotel.close()
@@ -0,0 +1,16 @@
+from hotel_management import HotelManagementSystem, MemoryStorage
+
+
+def test_failed_load_keeps_the_loaded_state():
+    storage = MemoryStorage()
+    hotel = HotelManagementSystem(storage=storage)
+    hotel.add_room("single", 100)
+    hotel.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    storage.tables["rooms"]["2"] = {"room_id": "2", "price": 200}
+
+    hotel.load_data()
+    assert hotel.load_error is not None
+    assert [room.room_id for room in hotel.rooms] == ["1"]
+    assert [guest.guest_id for guest in hotel.guests] == ["1"]
+    assert hotel.get_guest("1").name == "سارا"
+    hotel.close()
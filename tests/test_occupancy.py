@@ -0,0 +1,16 @@
+from hotel_management import format_day, today_day
+
+
+def test_early_check_out_frees_remaining_nights(hotel):
+    today = today_day()
+    room = hotel.add_room("single", 100)
+    guest = hotel.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    reservation = hotel.make_reservation(guest.guest_id, room.room_id, format_day(today), format_day(today + 3))
+    assert hotel.check_in(reservation.reservation_id)
+    assert [day["occupied"] for day in hotel.occupancy_forecast(format_day(today), 3)] == [1, 1, 1]
+
+    assert hotel.check_out(reservation.reservation_id) == 100
+    assert reservation.check_out_date == format_day(today)
+    assert [day["occupied"] for day in hotel.occupancy_forecast(format_day(today), 3)] == [0, 0, 0]
+    assert hotel.report_reservations_by_date(format_day(today + 1)) == []
+    assert hotel.is_room_available(room.room_id, format_day(today + 1), format_day(today + 3))
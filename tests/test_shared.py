@@ -0,0 +1,33 @@
+import pytest
+
+from hotel_management import HotelManagementSystem, format_day, jalali_today, today_day
+from hotel_management.storage import fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="shared mode needs fcntl")
+
+
+@pytest.fixture
+def terminals(tmp_path):
+    data_file = str(tmp_path / "hotel_data.json")
+    first = HotelManagementSystem(data_file, shared=True, durability="none")
+    second = HotelManagementSystem(data_file, shared=True, durability="none")
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_listings_see_other_terminal_changes(terminals):
+    first, second = terminals
+    room = first.add_room("single", 100)
+    guest = first.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    assert [g.guest_id for g in second.get_all_guests()] == [guest.guest_id]
+    assert [g.guest_id for g in second.search_guests("سارا")] == [guest.guest_id]
+
+    today = today_day()
+    reservation = first.make_reservation(guest.guest_id, room.room_id, format_day(today), format_day(today + 2))
+    assert second.report_income(jalali_today(), jalali_today()) == 0.0
+    first.check_in(reservation.reservation_id)
+    first.check_out(reservation.reservation_id)
+    assert second.report_income(jalali_today(), jalali_today()) == 100.0
+    assert second.report_income_by_room_type(jalali_today(), jalali_today()) == {"single": 100.0}
+    assert [r.status for r in second.get_room_reservations(room.room_id)] == ["تسویه شده"]
@@ -0,0 +1,23 @@
+import os
+
+from hotel_management import HotelManagementSystem
+
+
+def room_state(hotel):
+    return sorted((room.room_id, room.room_type, room.price) for room in hotel.rooms)
+
+
+def test_truncated_snapshot_falls_back_to_previous_generation(tmp_path, capsys):
+    data_file = str(tmp_path / "hotel_data.json")
+    hotel = HotelManagementSystem(data_file, durability="none")
+    hotel.add_room("single", 100)
+    hotel.add_room("double", 200)
+    hotel.close()
+    with open(data_file, "r+", encoding="utf-8") as f:
+        f.truncate(os.path.getsize(data_file) // 2)
+
+    hotel = HotelManagementSystem(data_file, durability="none")
+    assert hotel.load_error is None
+    assert room_state(hotel) == [("1", "single", 100)]
+    assert data_file + ".1" in capsys.readouterr().err
+    hotel.close()
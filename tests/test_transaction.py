@@ -0,0 +1,40 @@
+import pytest
+
+from hotel_management import format_day, today_day
+
+
+def test_transaction_rolls_back_on_error(hotel):
+    today = today_day()
+    room = hotel.add_room("single", 100)
+    guest = hotel.add_guest("سارا", "احمدی", "1234567890", "09123456789")
+    with pytest.raises(RuntimeError):
+        with hotel.transaction():
+            hotel.add_room("double", 200)
+            hotel.edit_room(room.room_id, price=150)
+            hotel.make_reservation(guest.guest_id, room.room_id, format_day(today), format_day(today + 2))
+            raise RuntimeError
+
+    assert [(item.room_id, item.price) for item in hotel.rooms] == [("1", 100)]
+    assert hotel.get_all_reservations() == []
+    assert hotel.is_room_available(room.room_id, format_day(today), format_day(today + 2))
+    assert [record["room_id"] for record in hotel.storage.load()["rooms"]] == ["1"]
+    assert hotel.add_room("double", 200).room_id == "2"
+
+
+def test_transaction_commits_once(hotel):
+    writes = []
+    write = hotel.storage.write_batch
+    hotel.storage.write_batch = lambda batch, snapshot: writes.append(len(batch)) or write(batch, snapshot)
+    with hotel.transaction():
+        for price in (100, 200, 300):
+            hotel.add_room("single", price)
+    assert writes == [1]
+    assert len(hotel.storage.load()["rooms"]) == 3
+
+
+def test_bulk_add_rejects_the_whole_batch(hotel):
+    with pytest.raises(ValueError):
+        hotel.add_guests([{"name": "سارا", "family": "احمدی", "national_id": "1234567890", "phone": "09123456789"},
+                          {"name": "علی", "family": "رضایی", "national_id": "123", "phone": "09111111111"}])
+    assert hotel.guests == []
+    assert hotel.storage.load()["guests"] == []